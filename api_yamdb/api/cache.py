@@ -0,0 +1,103 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+
+TITLE_LIST = 'titles'
+GENRE_LIST = 'genres'
+CATEGORY_LIST = 'categories'
+
+
+def title_key(title_id):
+    return f'title:{title_id}'
+
+
+def review_list_key(title_id):
+    return f'reviews:title:{title_id}'
+
+
+def review_key(review_id):
+    return f'review:{review_id}'
+
+
+def comment_list_key(review_id):
+    return f'comments:review:{review_id}'
+
+
+def comment_key(comment_id):
+    return f'comment:{comment_id}'
+
+
+def get_cache():
+    return caches[settings.TITLES_CACHE_ALIAS]
+
+
+def get_response_timeout():
+    return settings.TITLES_CACHE_TIMEOUT
+
+
+def version_key(name):
+    return f'version:{name}'
+
+
+def get_versions(*names):
+    """Возвращает версии ресурсов. Ресурсу без версии
+    назначается новая, чтобы ключи кэша были стабильны."""
+    cache = get_cache()
+    keys = {version_key(name): name for name in names}
+    stored = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in stored}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        stored.update(missing)
+    return {keys[key]: value for key, value in stored.items()}
+
+
+def bump_versions(*names):
+    """Назначает ресурсам новые версии после фиксации транзакции,
+    чтобы закэшированные ответы с прежними версиями не читались."""
+    if not names:
+        return
+    keys = [version_key(name) for name in names]
+
+    def bump():
+        version = time.time_ns()
+        get_cache().set_many(
+            {key: version for key in keys}, timeout=None
+        )
+
+    transaction.on_commit(bump)
+
+
+def invalidate_titles(title_ids=()):
+    """Сбрасывает кэш списка произведений и карточек title_ids."""
+    bump_versions(TITLE_LIST, *(title_key(pk) for pk in title_ids))
+
+
+def normalize_params(query_params, allowed):
+    """Оставляет в запросе только параметры, влияющие на ответ,
+    и приводит их к каноническому виду."""
+    items = []
+    for name in sorted(allowed):
+        values = sorted(query_params.getlist(name))
+        items.extend((name, value) for value in values)
+    return urlencode(items)
+
+
+def last_modified(versions):
+    """Время последнего изменения ресурсов в секундах: версия -
+    это время ее назначения в наносекундах."""
+    return max(versions.values()) // 10 ** 9
+
+
+def response_key(request, kind, versions, allowed):
+    raw = '|'.join([
+        request.get_host(),
+        kind,
+        ','.join(f'{name}={versions[name]}' for name in sorted(versions)),
+        normalize_params(request.query_params, allowed),
+    ])
+    return 'response:' + hashlib.md5(raw.encode()).hexdigest()
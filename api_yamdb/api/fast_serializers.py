@@ -0,0 +1,275 @@
+"""Быстрые read-only сериализаторы для списков и карточек.
+
+Строят ответ из словарей .values() без создания экземпляров моделей
+и без машинерии полей DRF. Результат совпадает побайтно с обычными
+сериализаторами из serializers.py, что проверяется тестами.
+"""
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from reviews.models import SCORES, Genre, ScoreHistogram
+from reviews.search import render_snippet
+from reviews.services import latest_comments, score_stats
+from .serializers import get_requested_fields
+
+
+class FastSerializer:
+    """Базовый быстрый сериализатор.
+
+    fields задает поля ответа в порядке обычного сериализатора,
+    field_values - колонки .values(), нужные каждому полю.
+    Значение поля берется методом get_<поле>(row), а если его нет -
+    из одноименной колонки.
+    """
+    fields = ()
+    field_values = {}
+    required_values = ('id',)
+
+    def __init__(self, context):
+        requested = get_requested_fields(context.get('request'), self.fields)
+        self.output_fields = [
+            field for field in self.fields
+            if requested is None or field in requested
+        ]
+        self.getters = [
+            (field, getattr(self, f'get_{field}', None))
+            for field in self.output_fields
+        ]
+
+    def prepare(self, queryset):
+        columns = dict.fromkeys(self.required_values)
+        for field in self.output_fields:
+            columns.update(dict.fromkeys(self.field_values[field]))
+        return queryset.prefetch_related(None).values(*columns)
+
+    def load_related(self, rows):
+        """Догружает связанные данные для всей страницы сразу."""
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        self.load_related(rows)
+        return [self.represent(row) for row in rows]
+
+    def represent(self, row):
+        return {
+            field: row[field] if getter is None else getter(row)
+            for field, getter in self.getters
+        }
+
+
+class PubDateMixin:
+    pub_date_field = serializers.DateTimeField()
+    # pub_date и id нужны для курсора пагинации.
+    required_values = ('id', 'pub_date')
+
+    def get_pub_date(self, row):
+        return self.pub_date_field.to_representation(row['pub_date'])
+
+
+class FastReviewSerializer(PubDateMixin, FastSerializer):
+    """Если в контексте передан embed_comments, к каждому отзыву
+    добавляется поле comments с последними embed_comments
+    комментариями, загруженными для всей страницы одним запросом."""
+    fields = ('id', 'text', 'author', 'score', 'pub_date', 'comment_count')
+    field_values = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'comment_count': ('comment_count',),
+    }
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.embed_comments = context.get('embed_comments')
+        if self.embed_comments is not None:
+            self.getters.append(('comments', self.get_comments))
+
+    def load_related(self, rows):
+        self.comments = defaultdict(list)
+        if self.embed_comments is None or not rows:
+            return
+        serializer = FastCommentSerializer(context={})
+        comments = latest_comments(
+            [row['id'] for row in rows], self.embed_comments
+        )
+        for comment in comments:
+            self.comments[comment.review_id].append(serializer.represent({
+                'id': comment.id,
+                'text': comment.text,
+                'author__username': comment.author_username,
+                'pub_date': comment.pub_date,
+            }))
+
+    def get_author(self, row):
+        return row['author__username']
+
+    def get_comments(self, row):
+        return self.comments[row['id']]
+
+
+class FastCommentSerializer(PubDateMixin, FastSerializer):
+    fields = ('id', 'text', 'author', 'pub_date')
+    field_values = {
+        'id': ('id',),
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
+
+    def get_author(self, row):
+        return row['author__username']
+
+
+class FastUserReviewSerializer(PubDateMixin, FastSerializer):
+    """Отзыв в ленте пользователя: вместо автора - произведение."""
+    fields = ('id', 'text', 'score', 'pub_date', 'comment_count', 'title')
+    field_values = {
+        'id': ('id',),
+        'text': ('text',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'comment_count': ('comment_count',),
+        'title': ('title_id', 'title__name'),
+    }
+
+    def get_title(self, row):
+        return {'id': row['title_id'], 'name': row['title__name']}
+
+
+class FastUserCommentSerializer(PubDateMixin, FastSerializer):
+    """Комментарий в ленте пользователя: вместо автора - отзыв
+    и его произведение."""
+    fields = ('id', 'text', 'pub_date', 'review', 'title')
+    field_values = {
+        'id': ('id',),
+        'text': ('text',),
+        'pub_date': ('pub_date',),
+        'review': ('review_id',),
+        'title': ('review__title_id', 'review__title__name'),
+    }
+
+    def get_review(self, row):
+        return row['review_id']
+
+    def get_title(self, row):
+        return {
+            'id': row['review__title_id'], 'name': row['review__title__name']
+        }
+
+
+class SearchResultMixin:
+    """Результат полнотекстового поиска: search_rank нужен
+    для сортировки, snippet - фрагмент текста от индекса FTS5."""
+    required_values = ('id', 'search_rank', 'snippet')
+
+    def get_snippet(self, row):
+        return render_snippet(row['snippet'])
+
+
+class FastReviewSearchSerializer(SearchResultMixin, PubDateMixin,
+                                 FastSerializer):
+    fields = ('id', 'title', 'author', 'score', 'pub_date', 'snippet')
+    field_values = {
+        'id': ('id',),
+        'title': ('title_id', 'title__name'),
+        'author': ('author__username',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'snippet': ('snippet',),
+    }
+
+    def get_title(self, row):
+        return {'id': row['title_id'], 'name': row['title__name']}
+
+    def get_author(self, row):
+        return row['author__username']
+
+
+class FastCommentSearchSerializer(SearchResultMixin, PubDateMixin,
+                                  FastSerializer):
+    fields = ('id', 'review', 'title', 'author', 'pub_date', 'snippet')
+    field_values = {
+        'id': ('id',),
+        'review': ('review_id',),
+        'title': ('review__title_id', 'review__title__name'),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+        'snippet': ('snippet',),
+    }
+
+    def get_review(self, row):
+        return row['review_id']
+
+    def get_title(self, row):
+        return {
+            'id': row['review__title_id'], 'name': row['review__title__name']
+        }
+
+    def get_author(self, row):
+        return row['author__username']
+
+
+class FastTitleSerializer(FastSerializer):
+    """Если в контексте передан embed_stats, к каждому произведению
+    добавляется поле stats со статистикой оценок."""
+    fields = (
+        'id', 'name', 'year', 'description', 'rating', 'review_count',
+        'genre', 'category',
+    )
+    field_values = {
+        'id': ('id',),
+        'name': ('name',),
+        'year': ('year',),
+        'description': ('description',),
+        'rating': ('score_sum', 'review_count'),
+        'review_count': ('review_count',),
+        'genre': (),
+        'category': ('category__name', 'category__slug'),
+    }
+    # name нужен для курсора пагинации.
+    required_values = ('id', 'name')
+
+    def __init__(self, context):
+        super().__init__(context)
+        self.embed_stats = context.get('embed_stats', False)
+        if self.embed_stats:
+            self.getters.append(('stats', self.get_stats))
+
+    def load_related(self, rows):
+        self.histograms = {}
+        if self.embed_stats and rows:
+            self.histograms = {
+                histogram.title_id: histogram.counts()
+                for histogram in ScoreHistogram.objects.filter(
+                    title_id__in=[row['id'] for row in rows]
+                )
+            }
+        self.genres = defaultdict(list)
+        if 'genre' not in self.output_fields or not rows:
+            return
+        links = Genre.objects.filter(
+            titles__id__in=[row['id'] for row in rows]
+        ).values_list('titles__id', 'name', 'slug')
+        for title_id, name, slug in links:
+            self.genres[title_id].append({'name': name, 'slug': slug})
+
+    def get_rating(self, row):
+        if not row['review_count']:
+            return None
+        return int(row['score_sum'] / row['review_count'])
+
+    def get_genre(self, row):
+        return self.genres[row['id']]
+
+    def get_stats(self, row):
+        return score_stats(
+            self.histograms.get(row['id'], [0] * len(SCORES))
+        )
+
+    def get_category(self, row):
+        if row['category__slug'] is None:
+            return None
+        return {'name': row['category__name'], 'slug': row['category__slug']}
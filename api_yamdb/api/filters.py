@@ -1,14 +1,59 @@
 from django_filters import rest_framework as filters
 
 from reviews.models import Title
+from reviews.search import search_titles
+from .genre_index import filter_by_ids, genre_index
 
 
 class TitleFilter(filters.FilterSet):
+    GENRE_ANY = 'any'
+    GENRE_ALL = 'all'
+    GENRE_MODES = (
+        (GENRE_ANY, 'Любой из жанров'),
+        (GENRE_ALL, 'Все жанры'),
+    )
 
     category = filters.CharFilter(field_name='category__slug')
-    genre = filters.CharFilter(field_name='genre__slug')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_mode = filters.ChoiceFilter(
+        choices=GENRE_MODES, method='filter_genre_mode'
+    )
     name = filters.CharFilter(lookup_expr='icontains')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
+
+    def filter_genre(self, queryset, name, value):
+        """Жанры передаются через запятую или повторением параметра:
+        ?genre=drama,comedy или ?genre=drama&genre=comedy."""
+        slugs = [
+            slug.strip()
+            for values in self.data.getlist(name)
+            for slug in values.split(',')
+            if slug.strip()
+        ]
+        if not slugs:
+            return queryset
+        match_all = self.form.cleaned_data.get('genre_mode') == self.GENRE_ALL
+        return filter_by_ids(
+            queryset, genre_index.get_titles(slugs, match_all)
+        )
+
+    def filter_genre_mode(self, queryset, name, value):
+        # Режим учитывается в filter_genre.
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
+
+
+class TopTitleFilter(filters.FilterSet):
+
+    category = filters.CharFilter(field_name='category__slug')
+    genre = filters.CharFilter(field_name='genre__slug')
+
+    class Meta:
+        model = Title
+        fields = ('category', 'genre', 'year')
@@ -0,0 +1,79 @@
+import json
+import threading
+
+from django.db import connection
+
+from reviews.models import Title
+from .cache import bump_versions, get_versions
+
+GENRE_INDEX = 'genre-index'
+
+
+class GenreIndex:
+    """Индекс «slug жанра -> множество id произведений» в памяти процесса.
+
+    Индекс строится одним запросом к таблице связей Title.genre.
+    Актуальность проверяется по версии в общем кэше: обработчики
+    сигналов меняют версию при записи, и каждый процесс перестраивает
+    свою копию при следующем обращении.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._titles = {}
+
+    def get_titles(self, slugs, match_all=False):
+        """Возвращает отсортированный список id произведений, у которых
+        есть все (match_all) или хотя бы один из жанров slugs."""
+        titles = self._get_fresh_titles()
+        sets = [titles.get(slug, frozenset()) for slug in set(slugs)]
+        if not sets:
+            return []
+        if match_all:
+            sets.sort(key=len)
+            result = sets[0].intersection(*sets[1:])
+        else:
+            result = frozenset().union(*sets)
+        return sorted(result)
+
+    def _get_fresh_titles(self):
+        version = get_versions(GENRE_INDEX)[GENRE_INDEX]
+        with self._lock:
+            if self._version != version:
+                self._titles = self._load()
+                self._version = version
+            return self._titles
+
+    @staticmethod
+    def _load():
+        grouped = {}
+        rows = Title.genre.through.objects.values_list(
+            'genre__slug', 'title_id'
+        )
+        for slug, title_id in rows.iterator():
+            grouped.setdefault(slug, set()).add(title_id)
+        return {slug: frozenset(ids) for slug, ids in grouped.items()}
+
+
+genre_index = GenreIndex()
+
+
+def invalidate_genre_index():
+    bump_versions(GENRE_INDEX)
+
+
+def filter_by_ids(queryset, ids):
+    """Фильтр pk IN ids. В SQLite список передается одним параметром
+    через json_each, чтобы не упираться в лимит числа параметров."""
+    if connection.vendor == 'sqlite':
+        opts = queryset.model._meta
+        column = '{}.{}'.format(
+            connection.ops.quote_name(opts.db_table),
+            connection.ops.quote_name(opts.pk.column),
+        )
+        return queryset.extra(
+            where=[f'{column} IN (SELECT value FROM json_each(%s))'],
+            params=[json.dumps(ids)],
+        )
+    return queryset.filter(pk__in=ids)
@@ -1,4 +1,18 @@
-from rest_framework import mixins, viewsets
+import hashlib
+
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import mixins, status, viewsets
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from reviews.models import Review
+from .cache import (get_cache, get_response_timeout, get_versions,
+                    last_modified, response_key)
+from .serializers import get_requested_fields
 
 
 class ListCreateDestroyViewSet(
@@ -6,3 +20,223 @@ class ListCreateDestroyViewSet(
     mixins.DestroyModelMixin, viewsets.GenericViewSet
 ):
     pass
+
+
+class NestedResourceMixin:
+    """Родительский отзыв вложенного маршрута
+    titles/<title_id>/reviews/<review_id>/comments.
+
+    Цепочка проверяется одним запросом: отзыв ищется сразу
+    по review_id и title_id, без отдельной загрузки произведения.
+    Результат запоминается на запросе и переиспользуется
+    в get_queryset, perform_create и проверках прав.
+    """
+
+    def get_nested_cache(self):
+        if not hasattr(self.request, 'nested_resources'):
+            self.request.nested_resources = {}
+        return self.request.nested_resources
+
+    def get_review(self):
+        resources = self.get_nested_cache()
+        if 'review' not in resources:
+            resources['review'] = get_object_or_404(
+                Review.objects.visible(),
+                pk=self.kwargs['review_id'],
+                title_id=self.kwargs['title_id'],
+            )
+        return resources['review']
+
+
+class ResourceVersionsMixin:
+    """Версии ресурсов, от которых зависит ответ вьюсета.
+
+    Вьюсет задает имена ресурсов атрибутом version_names или, если они
+    зависят от действия, переопределяет get_version_names. Обработчики
+    сигналов в signals.py меняют версии ресурсов при записи.
+    """
+
+    version_names = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if (
+            issubclass(cls, APIView)
+            and cls.version_names is None
+            and cls.get_version_names
+            is ResourceVersionsMixin.get_version_names
+        ):
+            raise ImproperlyConfigured(
+                f'{cls.__name__}: задайте version_names '
+                'или переопределите get_version_names.'
+            )
+
+    def get_version_names(self):
+        return self.version_names
+
+    def get_resource_versions(self):
+        if not hasattr(self, '_resource_versions'):
+            self._resource_versions = get_versions(
+                *self.get_version_names()
+            )
+        return self._resource_versions
+
+
+class ConditionalListMixin(ResourceVersionsMixin):
+    """Отдает ETag и Last-Modified для list и отвечает 304
+    на If-None-Match/If-Modified-Since по версиям ресурсов, не выполняя
+    основной запрос и сериализацию."""
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        versions = self.get_resource_versions()
+        raw = '|'.join([
+            request.get_full_path(),
+            request.accepted_media_type or '',
+            ','.join(f'{name}={versions[name]}' for name in sorted(versions)),
+        ])
+        etag = '"{}"'.format(hashlib.md5(raw.encode()).hexdigest())
+        modified = last_modified(versions)
+        not_modified = get_conditional_response(
+            request._request, etag=etag, last_modified=modified
+        )
+        response = not_modified or handler(request, *args, **kwargs)
+        if response.status_code in (
+            status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED
+        ):
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """Условные GET запросы для list и retrieve."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class CachedReadMixin(ResourceVersionsMixin):
+    """Кэширует ответы list и retrieve.
+
+    Ключ ответа строится из версий ресурсов, от которых он зависит,
+    и параметров запроса из cache_query_params. Обработчики сигналов
+    меняют версии при записи, так что устаревшие ответы больше
+    не читаются.
+    """
+    cache_query_params = ()
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        versions = self.get_resource_versions()
+        key = response_key(
+            request, self.action, versions, self.cache_query_params
+        )
+        cache = get_cache()
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, get_response_timeout())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class SparseFieldsQuerysetMixin:
+    """Урезает queryset под ?fields=: загружает только колонки и связи,
+    нужные запрошенным полям ответа.
+
+    field_columns сопоставляет поле ответа с колонками модели,
+    field_select_related и field_prefetch_related - со связями.
+    Колонки из required_columns загружаются всегда (ключ, сортировка).
+    Когда ответ строит быстрый сериализатор (FastReadMixin), колонки
+    выбирает он, и queryset не урезается.
+    """
+    field_columns = {}
+    field_select_related = {}
+    field_prefetch_related = {}
+    required_columns = ('id',)
+
+    def trim_queryset(self, queryset):
+        if getattr(self, 'fast_read', False):
+            return queryset
+        fields = get_requested_fields(self.request, self.field_columns)
+        requested = self.field_columns if fields is None else fields
+        queryset = queryset.select_related(*(
+            relation for field, relation in self.field_select_related.items()
+            if field in requested
+        )).prefetch_related(*(
+            relation for field, relation in self.field_prefetch_related.items()
+            if field in requested
+        ))
+        if fields is None:
+            return queryset
+        columns = set(self.required_columns)
+        for field in fields:
+            columns.update(self.field_columns[field])
+        return queryset.only(*columns)
+
+
+class FastReadMixin:
+    """Отдает list и retrieve через быстрый сериализатор
+    fast_serializer_class, если он задан для вьюсета.
+
+    На быстром пути fast_read равен True: колонки выбирает
+    prepare() сериализатора.
+    """
+    fast_serializer_class = None
+    fast_read = False
+
+    def get_fast_serializer(self):
+        return self.fast_serializer_class(
+            context=self.get_serializer_context()
+        )
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        self.fast_read = True
+        serializer = self.get_fast_serializer()
+        queryset = serializer.prepare(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+        return Response(serializer.to_representation(queryset))
+
+    def retrieve(self, request, *args, **kwargs):
+        if self.fast_serializer_class is None:
+            return super().retrieve(request, *args, **kwargs)
+        self.fast_read = True
+        serializer = self.get_fast_serializer()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        # Как rest_framework.generics.get_object_or_404: ключ
+        # неверного типа означает 404, а не ошибку сервера.
+        try:
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        rows = serializer.to_representation(serializer.prepare(queryset))
+        if not rows:
+            raise Http404
+        self.check_object_permissions(request, rows[0])
+        return Response(rows[0])
@@ -0,0 +1,187 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная (keyset) пагинация по набору полей.
+
+    Вместо OFFSET страница выбирается условием «строки после
+    последней показанной» по полям ordering, поэтому стоимость
+    запроса не зависит от номера страницы. Последнее поле ordering
+    должно быть уникальным (обычно id), значения полей не null.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+    page_size = api_settings.PAGE_SIZE
+    ordering = ()
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self.invert(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            try:
+                position = self.parse_position(queryset.model, position)
+                queryset = queryset.filter(self.seek(ordering, position))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position = self.previous_position = None
+        if rows:
+            if has_more or reverse:
+                self.next_position = self.get_position(rows[-1])
+            if position is not None and (has_more or not reverse):
+                self.previous_position = self.get_position(rows[0])
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def seek(ordering, position):
+        """Условие «строго после position» для составного ключа:
+        (a > x) OR (a = x AND b > y) OR ..."""
+        conditions = []
+        for index, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            lookups = {
+                prev.lstrip('-'): value
+                for prev, value in zip(ordering[:index], position)
+            }
+            lookups[f'{field.lstrip("-")}__{lookup}'] = position[index]
+            conditions.append(Q(**lookups))
+        return reduce(or_, conditions)
+
+    def get_position(self, row):
+        values = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            # Строки бывают и моделями, и словарями из .values().
+            value = row[name] if isinstance(row, dict) else getattr(row, name)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        return values
+
+    def parse_position(self, model, position):
+        """Приводит значения из курсора к типам полей ordering.
+        Ошибка приведения означает поддельный курсор."""
+        return [
+            model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(self.ordering, position)
+        ]
+
+    def encode_cursor(self, position, reverse):
+        data = json.dumps({'p': position, 'r': int(reverse)})
+        token = urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, token
+        )
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+        try:
+            data = json.loads(urlsafe_b64decode(token.encode()).decode())
+            position, reverse = data['p'], bool(data['r'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or (
+            len(position) != len(self.ordering)
+        ) or not all(
+            isinstance(value, (str, int, float))
+            and not isinstance(value, bool)
+            for value in position
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class OptionalCursorPagination(PageNumberPagination):
+    """Постраничная пагинация с курсорным режимом по запросу.
+
+    По умолчанию работает как PageNumberPagination. Курсорный режим
+    включается параметром ?pagination=cursor (или наличием cursor
+    в запросе) и использует KeysetPagination по cursor_ordering.
+    """
+    cursor_ordering = None
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.cursor_mode
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.use_cursor(request):
+            self.keyset = KeysetPagination(self.cursor_ordering)
+            self.keyset.page_size = self.get_page_size(request)
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class TitlePagination(OptionalCursorPagination):
+    cursor_ordering = ('name', 'id')
+
+
+class FeedPagination(OptionalCursorPagination):
+    """Ленты отзывов и комментариев: новые сверху."""
+    cursor_ordering = ('-pub_date', '-id')
+
+
+class UserFeedPagination(KeysetPagination):
+    """Ленты пользователя: всегда курсорные, новые сверху."""
+    ordering = ('-pub_date', '-id')
@@ -9,7 +9,7 @@ class IsAuthorOrReadOnly(permissions.IsAuthenticatedOrReadOnly):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        if obj.author == request.user:
+        if obj.author_id == request.user.pk:
             return True
         return False
 
@@ -37,3 +37,12 @@ class IsModeratorOrReadOnly(permissions.IsAuthenticatedOrReadOnly):
         if request.user.is_moderator:
             return True
         return False
+
+
+class IsModerator(permissions.BasePermission):
+
+    def has_permission(self, request, view):
+        return bool(
+            request.user.is_authenticated
+            and (request.user.is_moderator or request.user.is_admin)
+        )
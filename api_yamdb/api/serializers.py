@@ -1,11 +1,76 @@
+from collections import defaultdict
 from datetime import datetime
 
+from django.conf import settings
+from django.db import connection, transaction
 from rest_framework import serializers
 
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (SCORES, Category, Comment, Genre, Review,
+                            ScoreHistogram, Title)
+from reviews.moderation import ACTIONS, moderate
+from reviews.services import latest_comments, score_stats
+from .cache import invalidate_titles
+from .genre_index import filter_by_ids, invalidate_genre_index
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+def validate_title_year(value):
+    year_now = datetime.now().year
+    if not (0 < value <= year_now):
+        raise serializers.ValidationError(
+            'Проверьте год создания произведения!')
+    return value
+
+
+def get_requested_fields(request, available):
+    """Возвращает множество полей из ?fields=id,name,... для GET запроса.
+    Неизвестные поля отбрасываются. None означает, что нужны все поля."""
+    if request is None or request.method != 'GET':
+        return None
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    requested = {name.strip() for name in raw.split(',')} & set(available)
+    return requested or None
+
+
+def get_embedded(request):
+    """Возвращает множество связанных данных из ?embed=a,b
+    (параметр можно повторять) для GET запроса."""
+    if request is None or request.method != 'GET':
+        return set()
+    return {
+        name.strip()
+        for value in request.query_params.getlist('embed')
+        for name in value.split(',')
+    }
+
+
+class SparseFieldsMixin:
+    """Оставляет в ответе только поля, перечисленные в ?fields=."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = get_requested_fields(
+            self.context.get('request'), self.Meta.fields
+        )
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
+class ReviewListSerializer(serializers.ListSerializer):
+    """Загружает встраиваемые комментарии для всей страницы
+    одним запросом."""
+
+    def to_representation(self, data):
+        reviews = list(data)
+        self.child.load_comments(reviews)
+        return super().to_representation(reviews)
+
+
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Если в контексте передан embed_comments, к отзыву добавляется
+    поле comments с последними embed_comments комментариями."""
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
@@ -19,10 +84,35 @@ class ReviewSerializer(serializers.ModelSerializer):
             'author',
             'score',
             'pub_date',
+            'comment_count',
         )
+        list_serializer_class = ReviewListSerializer
 
+    def load_comments(self, reviews):
+        self.embedded_comments = defaultdict(list)
+        limit = self.context.get('embed_comments')
+        if limit is None or not reviews:
+            return
+        pub_date = serializers.DateTimeField()
+        comments = latest_comments([review.id for review in reviews], limit)
+        for comment in comments:
+            self.embedded_comments[comment.review_id].append({
+                'id': comment.id,
+                'text': comment.text,
+                'author': comment.author_username,
+                'pub_date': pub_date.to_representation(comment.pub_date),
+            })
 
-class CommentSerializer(serializers.ModelSerializer):
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.context.get('embed_comments') is not None:
+            if not hasattr(self, 'embedded_comments'):
+                self.load_comments([instance])
+            data['comments'] = self.embedded_comments[instance.id]
+        return data
+
+
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
@@ -52,7 +142,9 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug',)
 
 
-class TitleReadSerializer(serializers.ModelSerializer):
+class TitleReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """Если в контексте передан embed_stats, к произведению
+    добавляется поле stats со статистикой оценок."""
     genre = GenreSerializer(
         read_only=True,
         many=True
@@ -60,14 +152,36 @@ class TitleReadSerializer(serializers.ModelSerializer):
     category = CategorySerializer(
         read_only=True
     )
-    rating = serializers.IntegerField(
-        source='reviews__score__avg', read_only=True
+    rating = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Title
+        fields = (
+            'id', 'name', 'year', 'description', 'rating', 'review_count',
+            'genre', 'category',
+        )
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if self.context.get('embed_stats'):
+            try:
+                counts = instance.score_histogram.counts()
+            except ScoreHistogram.DoesNotExist:
+                counts = [0] * len(SCORES)
+            data['stats'] = score_stats(counts)
+        return data
+
+
+class TopTitleSerializer(TitleReadSerializer):
+    weighted_rating = serializers.FloatField(
+        source='ranking.score', read_only=True
     )
 
     class Meta:
         model = Title
         fields = (
-            'id', 'name', 'year', 'description', 'rating', 'genre', 'category',
+            'id', 'name', 'year', 'description', 'rating', 'weighted_rating',
+            'review_count', 'genre', 'category',
         )
 
 
@@ -89,8 +203,210 @@ class TitleCreateSerializer(TitleReadSerializer):
         )
 
     def validate_year(self, value):
-        year_now = datetime.now().year
-        if not (0 < value <= year_now):
+        return validate_title_year(value)
+
+
+class TitleBulkListSerializer(serializers.ListSerializer):
+    """Массовое создание и изменение произведений.
+
+    Slug всех категорий и жанров запроса разрешаются одним запросом
+    на каждую таблицу, произведения и связи с жанрами пишутся
+    bulk_create/bulk_update в одной транзакции. Ошибки возвращаются
+    списком по позициям элементов запроса. Проверку и запись нужно
+    выполнять в одной транзакции: найденные при проверке категории,
+    жанры и произведения блокируются select_for_update до записи.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({
+                'non_field_errors': ['Ожидается список произведений.']
+            })
+        if not data:
+            raise serializers.ValidationError({
+                'non_field_errors': ['Список произведений пуст.']
+            })
+        if len(data) > settings.TITLES_BULK_MAX_ITEMS:
+            raise serializers.ValidationError({
+                'non_field_errors': [
+                    'Слишком много произведений в одном запросе, '
+                    f'максимум {settings.TITLES_BULK_MAX_ITEMS}.'
+                ]
+            })
+        items, errors = [], []
+        for item in data:
+            try:
+                items.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                items.append(None)
+                errors.append(exc.detail)
+        self.resolve_relations(items, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    @staticmethod
+    def resolve_relations(items, errors):
+        valid = [item for item in items if item is not None]
+        categories = dict(Category.objects.select_for_update().filter(
+            slug__in={item['category'] for item in valid}
+        ).values_list('slug', 'id'))
+        genres = dict(Genre.objects.select_for_update().filter(
+            slug__in={slug for item in valid for slug in item['genre']}
+        ).values_list('slug', 'id'))
+        existing = set(Title.objects.select_for_update().filter(
+            id__in={item['id'] for item in valid if 'id' in item}
+        ).values_list('id', flat=True))
+        seen = set()
+        for item, item_errors in zip(items, errors):
+            if item is None:
+                continue
+            if 'id' in item and item['id'] not in existing:
+                item_errors['id'] = [
+                    f'Произведение с id={item["id"]} не найдено.'
+                ]
+            elif 'id' in item and item['id'] in seen:
+                item_errors['id'] = [
+                    f'Произведение с id={item["id"]} повторяется в запросе.'
+                ]
+            seen.add(item.get('id'))
+            if item['category'] not in categories:
+                item_errors['category'] = [
+                    f'Категория «{item["category"]}» не найдена.'
+                ]
+            unknown = [slug for slug in item['genre'] if slug not in genres]
+            if unknown:
+                item_errors['genre'] = [
+                    f'Жанр «{slug}» не найден.' for slug in unknown
+                ]
+            item['category_id'] = categories.get(item['category'])
+            item['genre_ids'] = sorted({
+                genres[slug] for slug in item['genre'] if slug in genres
+            })
+
+    @transaction.atomic
+    def create(self, validated_data):
+        batch_size = settings.TITLES_BULK_BATCH_SIZE
+        titles = [
+            Title(
+                id=item.get('id'),
+                name=item['name'],
+                year=item['year'],
+                description=item.get('description'),
+                category_id=item['category_id'],
+            )
+            for item in validated_data
+        ]
+        created = [title for title in titles if title.id is None]
+        updated = [title for title in titles if title.id is not None]
+        self.insert_titles(created, batch_size)
+        Title.objects.bulk_update(
+            updated, ('name', 'year', 'description', 'category'),
+            batch_size=batch_size
+        )
+
+        TitleGenre = Title.genre.through
+        TitleGenre.objects.filter(
+            title_id__in=[title.id for title in updated]
+        ).delete()
+        TitleGenre.objects.bulk_create(
+            [
+                TitleGenre(title_id=title.id, genre_id=genre_id)
+                for title, item in zip(titles, validated_data)
+                for genre_id in item['genre_ids']
+            ],
+            batch_size=batch_size
+        )
+
+        # bulk-операции не отправляют сигналы моделей.
+        invalidate_titles([title.id for title in updated])
+        invalidate_genre_index()
+
+        ids = [title.id for title in titles]
+        loaded = filter_by_ids(
+            Title.objects.select_related('category').prefetch_related('genre'),
+            ids
+        ).in_bulk()
+        return [loaded[pk] for pk in ids]
+
+    @staticmethod
+    def insert_titles(created, batch_size):
+        """Вставляет новые произведения и назначает им id.
+
+        Бэкенд, возвращающий id из INSERT, назначает их сам. В SQLite
+        пишет только одно соединение, и оно удерживает блокировку до
+        конца транзакции, а id с AUTOINCREMENT растут монотонно, поэтому
+        наши строки - последние len(created) id. На остальных бэкендах
+        одновременные вставки перемешивают id, и строки вставляются
+        по одной.
+        """
+        if not created:
+            return
+        features = connection.features
+        if features.can_return_ids_from_bulk_insert:
+            Title.objects.bulk_create(created, batch_size=batch_size)
+            return
+        if connection.vendor != 'sqlite':
+            for title in created:
+                title.save(force_insert=True)
+            return
+        Title.objects.bulk_create(created, batch_size=batch_size)
+        ids = Title.objects.order_by('-id').values_list(
+            'id', flat=True
+        )[:len(created)]
+        for title, pk in zip(created, reversed(ids)):
+            title.id = pk
+
+
+class TitleBulkItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(required=False)
+    name = serializers.CharField(max_length=200)
+    year = serializers.IntegerField(validators=[validate_title_year])
+    description = serializers.CharField(
+        required=False, allow_blank=True, allow_null=True
+    )
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+
+    class Meta:
+        list_serializer_class = TitleBulkListSerializer
+
+
+class ModerationSerializer(serializers.Serializer):
+    """Массовая модерация: удаление, скрытие или возврат отзывов
+    и комментариев по id и по авторам."""
+    action = serializers.ChoiceField(choices=ACTIONS)
+    reviews = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False
+    )
+    comments = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False
+    )
+    authors = serializers.ListField(
+        child=serializers.CharField(max_length=150), required=False
+    )
+
+    def validate(self, data):
+        targets = [
+            data.get(name, []) for name in ('reviews', 'comments', 'authors')
+        ]
+        if not any(targets):
             raise serializers.ValidationError(
-                'Проверьте год создания произведения!')
-        return value
+                'Укажите отзывы, комментарии или авторов.'
+            )
+        if sum(map(len, targets)) > settings.MODERATION_MAX_ITEMS:
+            raise serializers.ValidationError(
+                'Не больше {} объектов за запрос.'.format(
+                    settings.MODERATION_MAX_ITEMS
+                )
+            )
+        return data
+
+    def create(self, validated_data):
+        return moderate(
+            validated_data['action'],
+            review_ids=validated_data.get('reviews', []),
+            comment_ids=validated_data.get('comments', []),
+            authors=validated_data.get('authors', []),
+        )
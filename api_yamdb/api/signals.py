@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.moderation import moderated
+from .cache import (CATEGORY_LIST, GENRE_LIST, bump_versions, comment_key,
+                    comment_list_key, invalidate_titles, review_key,
+                    review_list_key)
+from .genre_index import invalidate_genre_index
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate_titles([instance.pk])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    bump_versions(
+        review_key(instance.pk), review_list_key(instance.title_id)
+    )
+    # Отзывы меняют рейтинг произведения.
+    invalidate_titles([instance.title_id])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    # Комментарии меняют счетчик comment_count в ответе отзыва.
+    title_id = Review.objects.filter(pk=instance.review_id).values_list(
+        'title_id', flat=True
+    ).first()
+    bump_versions(
+        comment_key(instance.pk), comment_list_key(instance.review_id),
+        review_key(instance.review_id),
+        *([review_list_key(title_id)] if title_id is not None else ()),
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_name(sender, instance, created, **kwargs):
+    # Имя автора входит в ответы с его отзывами и комментариями,
+    # в том числе в комментарии, встроенные в отзывы.
+    changed = not created and instance.username_changed()
+    instance.remember_username()
+    if not changed:
+        return
+    versions = set()
+    reviews = Review.objects.filter(author=instance).values_list(
+        'pk', 'title_id'
+    )
+    for review_id, title_id in reviews:
+        versions.update((review_key(review_id), review_list_key(title_id)))
+    comments = Comment.objects.filter(author=instance).values_list(
+        'pk', 'review_id', 'review__title_id'
+    )
+    for comment_id, review_id, title_id in comments:
+        versions.update((
+            comment_key(comment_id), comment_list_key(review_id),
+            review_key(review_id), review_list_key(title_id),
+        ))
+    bump_versions(*versions)
+
+
+@receiver(moderated)
+def invalidate_moderated(sender, result, **kwargs):
+    # Модерация меняет строки в обход сигналов моделей.
+    versions = set()
+    for review_id, title_id in result.reviews:
+        versions.update((
+            review_key(review_id), review_list_key(title_id),
+            comment_list_key(review_id),
+        ))
+    for comment_id, review_id, title_id in result.comments:
+        versions.update((
+            comment_key(comment_id), comment_list_key(review_id),
+            review_key(review_id), review_list_key(title_id),
+        ))
+    bump_versions(*versions)
+    invalidate_titles({title_id for _, title_id in result.reviews})
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, instance, action, reverse, pk_set,
+                            **kwargs):
+    if reverse and action == 'pre_clear':
+        # После очистки со стороны жанра связанных произведений не узнать.
+        title_ids = instance.titles.values_list('pk', flat=True)
+    elif reverse and action in ('post_add', 'post_remove'):
+        title_ids = pk_set
+    elif not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        title_ids = [instance.pk]
+    else:
+        return
+    invalidate_titles(title_ids)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def invalidate_group_titles(sender, instance, created=False, **kwargs):
+    bump_versions(CATEGORY_LIST if sender is Category else GENRE_LIST)
+    if created:
+        return
+    # Берем произведения до удаления: после него связи уже стерты.
+    invalidate_titles(
+        instance.titles.values_list('pk', flat=True)
+    )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_genre_index_links(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_genre_index()
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre_index_rows(sender, created=False, **kwargs):
+    if not created:
+        invalidate_genre_index()
@@ -0,0 +1,156 @@
+"""Ограничение частоты запросов алгоритмом token bucket.
+
+У каждого ключа (область и IP, имя пользователя или email) есть
+корзина емкостью N жетонов, которая пополняется со скоростью N за
+период из DEFAULT_THROTTLE_RATES ('N/period'). Запрос забирает один
+жетон; пустая корзина означает ответ 429 с Retry-After.
+
+Корзины хранятся в памяти процесса, проверка не обращается к базе.
+Если задан THROTTLE_CACHE_ALIAS, корзины хранятся в общем кэше Django
+и действуют на все процессы; чтение и запись корзины там не атомарны,
+поэтому при одновременных запросах лимит соблюдается приближенно.
+"""
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'N/period' -> (емкость корзины, период пополнения в секундах)
+    или None, если ограничение отключено."""
+    if rate is None:
+        return None
+    number, period = rate.split('/')
+    return int(number), PERIODS[period[0]]
+
+
+def refill(bucket, capacity, period, now):
+    """Забирает жетон из корзины (tokens, stamp). Возвращает новую
+    корзину и паузу до следующего жетона (0, если жетон взят)."""
+    tokens, stamp = bucket or (capacity, now)
+    tokens = min(capacity, tokens + (now - stamp) * capacity / period)
+    if tokens >= 1:
+        return (tokens - 1, now), 0
+    return (tokens, now), (1 - tokens) * period / capacity
+
+
+class BucketStore:
+    """Корзины в памяти процесса. Число корзин ограничено
+    THROTTLE_MAX_BUCKETS: давно не использованные вытесняются."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def take(self, key, capacity, period):
+        shared = self._shared_cache()
+        now = time.time()
+        if shared is not None:
+            bucket, wait = refill(shared.get(key), capacity, period, now)
+            shared.set(key, bucket, period)
+            return wait
+        with self._lock:
+            bucket, wait = refill(
+                self._buckets.pop(key, None), capacity, period, now
+            )
+            self._buckets[key] = bucket
+            while len(self._buckets) > settings.THROTTLE_MAX_BUCKETS:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    @staticmethod
+    def _shared_cache():
+        if settings.THROTTLE_CACHE_ALIAS is None:
+            return None
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+bucket_store = BucketStore()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Ограничение по IP клиента для области scope."""
+    scope = None
+
+    def get_idents(self, request, view):
+        return [self.get_ident(request)]
+
+    def allow_request(self, request, view):
+        self.delay = 0
+        rate = parse_rate(
+            api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+        )
+        if rate is None:
+            return True
+        for ident in self.get_idents(request, view):
+            self.delay = max(self.delay, bucket_store.take(
+                f'throttle:{self.scope}:{ident}', *rate
+            ))
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+
+class IdentityThrottle(TokenBucketThrottle):
+    """Ограничение по значениям полей запроса (имя, email), чтобы
+    перебор по одному аккаунту не обходил лимит сменой IP. Тело не
+    в виде объекта полей не дает: такой запрос ограничивается по IP
+    соседним TokenBucketThrottle."""
+    fields = ()
+
+    def get_idents(self, request, view):
+        idents = []
+        if not isinstance(request.data, Mapping):
+            return idents
+        for field in self.fields:
+            value = request.data.get(field)
+            if isinstance(value, str) and value.strip():
+                idents.append(f'{field}:{value.strip().lower()}')
+        return idents
+
+
+class SignupThrottle(TokenBucketThrottle):
+    scope = 'signup'
+
+
+class SignupIdentityThrottle(IdentityThrottle):
+    scope = 'signup_identity'
+    fields = ('username', 'email')
+
+
+class TokenObtainThrottle(TokenBucketThrottle):
+    scope = 'token'
+
+
+class TokenObtainIdentityThrottle(IdentityThrottle):
+    scope = 'token_identity'
+    fields = ('username',)
+
+
+class WriteThrottle(TokenBucketThrottle):
+    """Ограничение изменяющих запросов по пользователю или IP.
+    Чтение не ограничивается."""
+    scope = 'write'
+
+    def allow_request(self, request, view):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return True
+        return super().allow_request(request, view)
+
+    def get_idents(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return [f'user:{request.user.pk}']
+        return super().get_idents(request, view)
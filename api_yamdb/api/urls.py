@@ -5,8 +5,13 @@ from .views import (
     ReviewViewSet,
     CommentViewSet,
     CategoryViewSet,
+    CommentSearchViewSet,
     GenreViewSet,
+    ModerationView,
+    ReviewSearchViewSet,
     TitleViewSet,
+    UserCommentViewSet,
+    UserReviewViewSet,
 )
 
 v1_router = routers.DefaultRouter()
@@ -23,7 +28,34 @@ v1_router.register(
     CommentViewSet,
     basename='comment'
 )
+v1_router.register(
+    r'users/(?P<username>[^/.]+)/reviews',
+    UserReviewViewSet,
+    basename='user-review'
+)
+v1_router.register(
+    r'users/(?P<username>[^/.]+)/comments',
+    UserCommentViewSet,
+    basename='user-comment'
+)
+v1_router.register(
+    r'search/reviews', ReviewSearchViewSet, basename='review-search'
+)
+v1_router.register(
+    r'search/comments', CommentSearchViewSet, basename='comment-search'
+)
+v1_router.register(
+    r'titles/(?P<title_id>\d+)/search/reviews',
+    ReviewSearchViewSet,
+    basename='title-review-search'
+)
+v1_router.register(
+    r'titles/(?P<title_id>\d+)/search/comments',
+    CommentSearchViewSet,
+    basename='title-comment-search'
+)
 
 urlpatterns = [
+    path('v1/moderation/', ModerationView.as_view(), name='moderation'),
     path('v1/', include(v1_router.urls)),
 ]
@@ -1,19 +1,45 @@
-from django.db.models import Avg
-from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.http import Http404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, viewsets
+from rest_framework import (filters, mixins, permissions, status, views,
+                            viewsets)
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
 from rest_framework.validators import ValidationError
 
-from reviews.models import Category, Genre, Title, Review
+from reviews.models import (SCORES, Category, Comment, Genre, Review,
+                            ScoreHistogram, Title)
+from reviews.search import (COMMENT_FTS, REVIEW_FTS, build_match_query,
+                            search_texts)
+from reviews.services import score_stats
 from . import serializers
-from .filters import TitleFilter
-from .mixins import ListCreateDestroyViewSet
+from .cache import (CATEGORY_LIST, GENRE_LIST, TITLE_LIST, comment_key,
+                    comment_list_key, review_key, review_list_key, title_key)
+from .filters import TitleFilter, TopTitleFilter
+from .fast_serializers import (FastCommentSearchSerializer,
+                               FastCommentSerializer,
+                               FastReviewSearchSerializer,
+                               FastReviewSerializer,
+                               FastUserCommentSerializer,
+                               FastUserReviewSerializer,
+                               FastTitleSerializer)
+from .mixins import (CachedReadMixin, ConditionalGetMixin,
+                     ConditionalListMixin, FastReadMixin,
+                     ListCreateDestroyViewSet, NestedResourceMixin,
+                     SparseFieldsQuerysetMixin)
+from .pagination import FeedPagination, TitlePagination, UserFeedPagination
 from .permissions import (
     IsAdminOrReadOnly,
+    IsModerator,
     IsModeratorOrReadOnly,
     IsAuthorOrReadOnly
 )
 
+User = get_user_model()
+
 
 class CommonViewSet(viewsets.ModelViewSet):
     permission_classes = (
@@ -21,87 +47,333 @@ class CommonViewSet(viewsets.ModelViewSet):
     )
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(ConditionalListMixin, ListCreateDestroyViewSet):
     queryset = Category.objects.all()
     serializer_class = serializers.CategorySerializer
     permission_classes = (IsAdminOrReadOnly,)
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
+    version_names = (CATEGORY_LIST,)
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class GenreViewSet(ConditionalListMixin, ListCreateDestroyViewSet):
     queryset = Genre.objects.all()
     serializer_class = serializers.GenreSerializer
     permission_classes = (IsAdminOrReadOnly,)
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
+    version_names = (GENRE_LIST,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Title
-        .objects
-        .annotate(Avg('reviews__score'))
-        .select_related('category')
-        .prefetch_related('genre')
-        .order_by('name')
-    )
+class TitleViewSet(ConditionalGetMixin, CachedReadMixin, FastReadMixin,
+                   SparseFieldsQuerysetMixin, viewsets.ModelViewSet):
+    queryset = Title.objects.order_by('name')
+    fast_serializer_class = FastTitleSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
+    cache_query_params = (
+        *TitleFilter.base_filters, 'page', 'pagination', 'cursor', 'fields',
+        'embed',
+    )
+    field_columns = {
+        'id': (),
+        'name': (),
+        'year': ('year',),
+        'description': ('description',),
+        'rating': ('score_sum', 'review_count'),
+        'review_count': ('review_count',),
+        'genre': (),
+        'category': ('category',),
+    }
+    field_select_related = {'category': 'category'}
+    field_prefetch_related = {'genre': 'genre'}
+    # name нужен для сортировки и курсора пагинации.
+    required_columns = ('id', 'name')
+
+    def get_queryset(self):
+        queryset = self.trim_queryset(super().get_queryset())
+        if self.get_embed_stats() and not self.fast_read:
+            queryset = queryset.prefetch_related('score_histogram')
+        return queryset
+
+    def get_embed_stats(self):
+        return (
+            self.action in ('list', 'retrieve')
+            and 'stats' in serializers.get_embedded(self.request)
+        )
+
+    def get_version_names(self):
+        if self.action in ('retrieve', 'stats'):
+            return (title_key(self.kwargs['pk']),)
+        return (TITLE_LIST,)
 
     def get_serializer_class(self):
         if self.request.method in 'GET':
             return serializers.TitleReadSerializer
         return serializers.TitleCreateSerializer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['embed_stats'] = self.get_embed_stats()
+        return context
+
+    @action(['get'], detail=True)
+    def stats(self, request, pk=None):
+        """Распределение оценок произведения, средняя и медиана."""
+        return self.conditional_response(self.get_stats, request, pk=pk)
+
+    def get_stats(self, request, pk=None):
+        fields = [
+            f'score_histogram__{ScoreHistogram.field_name(score)}'
+            for score in SCORES
+        ]
+        # Отсутствие произведения и его распределения различаются
+        # одним запросом с LEFT JOIN.
+        counts = get_object_or_404(
+            Title.objects.values_list(*fields), pk=pk
+        )
+        return Response(score_stats([count or 0 for count in counts]))
+
+    @action(['get'], detail=False)
+    def top(self, request):
+        """Топ произведений по взвешенной оценке из TitleRanking."""
+        try:
+            limit = int(request.query_params.get(
+                'limit', settings.TOP_TITLES_DEFAULT_LIMIT
+            ))
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число.'})
+        limit = max(1, min(limit, settings.TOP_TITLES_MAX_LIMIT))
+        filterset = TopTitleFilter(
+            request.query_params,
+            queryset=(
+                Title.objects
+                .filter(ranking__isnull=False)
+                .select_related('category', 'ranking')
+                .prefetch_related('genre')
+                .order_by('-ranking__score', 'ranking__pk')
+            ),
+            request=request,
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        serializer = serializers.TopTitleSerializer(
+            filterset.qs[:limit], many=True,
+            context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(['post'], detail=False)
+    def bulk(self, request):
+        serializer = serializers.TitleBulkItemSerializer(
+            data=request.data, many=True
+        )
+        # Проверка ссылок и запись в одной транзакции: строки, найденные
+        # при проверке, заблокированы до записи.
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            titles = serializer.save()
+        return Response(
+            serializers.TitleReadSerializer(titles, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
 
-class ReviewViewSet(CommonViewSet):
+
+class ReviewViewSet(ConditionalGetMixin, FastReadMixin,
+                    SparseFieldsQuerysetMixin, CommonViewSet):
     serializer_class = serializers.ReviewSerializer
+    fast_serializer_class = FastReviewSerializer
+    pagination_class = FeedPagination
+    field_columns = {
+        'id': (),
+        'text': ('text',),
+        'author': ('author', 'author__username'),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'comment_count': ('comment_count',),
+    }
+    field_select_related = {'author': 'author'}
+    required_columns = ('id', 'pub_date')
+
+    def get_version_names(self):
+        if self.action == 'retrieve':
+            return (review_key(self.kwargs['pk']),)
+        return (review_list_key(self.kwargs['title_id']),)
 
     def get_queryset(self):
-        return Review.objects.filter(
+        return self.trim_queryset(Review.objects.visible().filter(
             title__id=self.kwargs['title_id']
-        ).select_related(
-            'author'
-        )
+        ))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == 'list':
+            context['embed_comments'] = self.get_embed_comments_limit()
+        return context
+
+    def get_embed_comments_limit(self):
+        """Число комментариев для ?embed=comments&comments_limit=N
+        или None, если встраивать комментарии не нужно."""
+        if 'comments' not in serializers.get_embedded(self.request):
+            return None
+        params = self.request.query_params
+        try:
+            limit = int(params.get(
+                'comments_limit',
+                settings.REVIEW_EMBED_COMMENTS_DEFAULT_LIMIT
+            ))
+        except ValueError:
+            raise ValidationError(
+                {'comments_limit': 'Ожидается целое число.'}
+            )
+        return max(1, min(limit, settings.REVIEW_EMBED_COMMENTS_MAX_LIMIT))
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs['title_id'])
-        author = self.request.user
-        if Review.objects.filter(
-            title=title,
-            author=author
-        ).exists():
+        # Произведение не загружается и повтор не проверяется заранее:
+        # за обоими следят ограничения базы, и параллельные запросы
+        # не проскакивают между проверкой и вставкой.
+        title_id = self.kwargs['title_id']
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    title_id=title_id,
+                    author_id=self.request.user.pk,
+                )
+        except IntegrityError:
+            # Внешние ключи SQLite проверяются при фиксации, поэтому
+            # отсутствие произведения тоже приходит сюда.
+            if not Title.objects.filter(pk=title_id).exists():
+                raise Http404
             raise ValidationError('Нельзя размещать более одного ревью.')
 
-        serializer.save(
-            title=title,
-            author=author,
-        )
-
 
-class CommentViewSet(CommonViewSet):
+class CommentViewSet(ConditionalGetMixin, FastReadMixin, NestedResourceMixin,
+                     SparseFieldsQuerysetMixin, CommonViewSet):
     serializer_class = serializers.CommentSerializer
+    fast_serializer_class = FastCommentSerializer
+    pagination_class = FeedPagination
+    field_columns = {
+        'id': (),
+        'text': ('text',),
+        'author': ('author', 'author__username'),
+        'pub_date': ('pub_date',),
+    }
+    field_select_related = {'author': 'author'}
+    required_columns = ('id', 'pub_date')
 
-    def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs['review_id'])
+    def get_version_names(self):
+        if self.action == 'retrieve':
+            return (comment_key(self.kwargs['pk']),)
+        return (comment_list_key(self.kwargs['review_id']),)
 
     def get_queryset(self):
-        return self.get_review().comments.all().select_related(
-            'author'
+        return self.trim_queryset(
+            Comment.objects.visible().filter(review=self.get_review())
         )
 
     def perform_create(self, serializer):
-        review = self.get_review()
-        title = get_object_or_404(Title, id=self.kwargs['title_id'])
+        serializer.save(
+            author_id=self.request.user.pk,
+            review=self.get_review()
+        )
 
-        if review.title != title:
-            raise ValidationError('Ревью не соответствует Произведению')
 
-        serializer.save(
-            author=self.request.user,
-            review=review
+class UserFeedViewSet(FastReadMixin, mixins.ListModelMixin,
+                      viewsets.GenericViewSet):
+    """Лента отзывов или комментариев пользователя, новые сверху.
+    Читается по индексу (author, -pub_date, -id) курсорными страницами."""
+    pagination_class = UserFeedPagination
+    permission_classes = (permissions.IsAuthenticatedOrReadOnly,)
+    model = None
+
+    def get_author_id(self):
+        author = get_object_or_404(
+            User.objects.only('id'), username=self.kwargs['username']
         )
+        return author.id
+
+    def get_queryset(self):
+        return self.model.objects.visible().filter(
+            author_id=self.get_author_id()
+        )
+
+
+class UserReviewViewSet(UserFeedViewSet):
+    model = Review
+    fast_serializer_class = FastUserReviewSerializer
+
+
+class UserCommentViewSet(UserFeedViewSet):
+    model = Comment
+    fast_serializer_class = FastUserCommentSerializer
+
+    def get_queryset(self):
+        # Комментарии к скрытым отзывам тоже не показываются.
+        return super().get_queryset().filter(review__is_hidden=False)
+
+
+class TextSearchViewSet(FastReadMixin, mixins.ListModelMixin,
+                        viewsets.GenericViewSet):
+    """Полнотекстовый поиск ?q= по отзывам или комментариям,
+    от более релевантных к менее. С title_id в маршруте ищет
+    в пределах произведения, без него - по всем (для модераторов)."""
+    search_query_param = 'q'
+    model = None
+    fts_index = None
+    title_lookup = None
+
+    def get_permissions(self):
+        if 'title_id' in self.kwargs:
+            return [permissions.AllowAny()]
+        return [IsModerator()]
+
+    def get_queryset(self):
+        text = self.request.query_params.get(self.search_query_param, '')
+        if not build_match_query(text):
+            raise ValidationError({
+                self.search_query_param:
+                    'Укажите строку поиска хотя бы с одним словом.'
+            })
+        queryset = self.model.objects.visible()
+        if 'title_id' in self.kwargs:
+            queryset = queryset.filter(
+                **{self.title_lookup: self.kwargs['title_id']}
+            )
+        return search_texts(queryset, self.fts_index, text)
+
+
+class ReviewSearchViewSet(TextSearchViewSet):
+    model = Review
+    fts_index = REVIEW_FTS
+    title_lookup = 'title_id'
+    fast_serializer_class = FastReviewSearchSerializer
+
+
+class CommentSearchViewSet(TextSearchViewSet):
+    model = Comment
+    fts_index = COMMENT_FTS
+    title_lookup = 'review__title_id'
+    fast_serializer_class = FastCommentSearchSerializer
+
+    def get_queryset(self):
+        # Комментарии к скрытым отзывам тоже не ищутся.
+        return super().get_queryset().filter(review__is_hidden=False)
+
+
+class ModerationView(views.APIView):
+    """Массовая модерация отзывов и комментариев одним запросом."""
+    permission_classes = (IsModerator,)
+
+    def post(self, request):
+        serializer = serializers.ModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        return Response({
+            'action': serializer.validated_data['action'],
+            'reviews': len(result.reviews),
+            'comments': len(result.comments),
+        })
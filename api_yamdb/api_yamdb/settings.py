@@ -31,6 +31,8 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'reviews.apps.ReviewsConfig',
     'api.apps.ApiConfig',
+    'jobs.apps.JobsConfig',
+    'mailer.apps.MailerConfig',
 ]
 
 MIDDLEWARE = [
@@ -75,6 +77,97 @@ DATABASES = {
 }
 
 
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Отметки об отзыве утверждений токенов (users.authentication).
+    # Отдельно от кэша ответов: вытеснение отметки снова сделало бы
+    # устаревшую роль доверенной. Записей не больше, чем пользователей,
+    # чьи роли менялись за время жизни токена.
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth',
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    },
+}
+
+TITLES_CACHE_ALIAS = 'default'
+
+TITLES_CACHE_TIMEOUT = 60 * 15
+
+
+# Массовая загрузка произведений
+
+TITLES_BULK_MAX_ITEMS = 5000
+
+TITLES_BULK_BATCH_SIZE = 500
+
+
+# Топ произведений: байесовская средняя оценка
+
+RATING_PRIOR_MEAN = 5.5
+
+RATING_PRIOR_WEIGHT = 5
+
+TOP_TITLES_DEFAULT_LIMIT = 10
+
+TOP_TITLES_MAX_LIMIT = 100
+
+
+# Последние комментарии в списке отзывов (?embed=comments)
+
+REVIEW_EMBED_COMMENTS_DEFAULT_LIMIT = 3
+
+REVIEW_EMBED_COMMENTS_MAX_LIMIT = 20
+
+
+# Массовая модерация: максимум id и авторов в одном запросе
+
+MODERATION_MAX_ITEMS = 1000
+
+
+# Фоновые задачи (приложение jobs, обработчик - manage.py run_jobs)
+
+# True - выполнять задачи сразу после фиксации транзакции в том же
+# процессе, без обработчика очереди.
+JOBS_EAGER = False
+
+JOBS_MAX_ATTEMPTS = 5
+
+# Пауза перед первым повтором в секундах, дальше удваивается.
+JOBS_RETRY_DELAY = 30
+
+# На сколько секунд задача закрепляется за обработчиком.
+JOBS_LEASE = 300
+
+# Сколько секунд хранить выполненные и неудачные задачи.
+JOBS_RETENTION = 7 * 24 * 60 * 60
+
+
+# Исходящая почта (приложение mailer, отправитель - manage.py send_outbox)
+
+# True - отправлять письма сразу после фиксации транзакции в том же
+# процессе, без отдельного отправителя.
+MAILER_EAGER = False
+
+# Сколько писем отправлять через одно соединение с почтовым сервером.
+MAILER_BATCH_SIZE = 50
+
+MAILER_MAX_ATTEMPTS = 5
+
+# Пауза перед первым повтором в секундах, дальше удваивается.
+MAILER_RETRY_DELAY = 60
+
+# На сколько секунд письмо закрепляется за отправителем.
+MAILER_LEASE = 300
+
+# Сколько секунд хранить отправленные и неудачные письма (без текста).
+MAILER_RETENTION = 7 * 24 * 60 * 60
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -121,13 +214,38 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+
+    # Ограничение частоты запросов (api.throttling): 'N/period' - корзина
+    # на N запросов, пополняется N жетонами за период; None - без лимита.
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.WriteThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': '20/hour',
+        'signup_identity': '5/hour',
+        'token': '30/min',
+        'token_identity': '10/min',
+        'write': '120/min',
+    },
+    # Число доверенных прокси перед приложением: IP клиента для
+    # ограничений берется из X-Forwarded-For только за ними. 0 - только
+    # REMOTE_ADDR, иначе клиент подменяет IP своим заголовком.
+    'NUM_PROXIES': 0,
 }
 
+# Общий кэш Django для корзин ограничения частоты или None, чтобы
+# хранить их в памяти процесса. При нескольких процессах без общего
+# кэша лимит действует в каждом процессе отдельно.
+THROTTLE_CACHE_ALIAS = None
+
+# Сколько корзин хранить в памяти процесса.
+THROTTLE_MAX_BUCKETS = 100000
+
 
 # Аутентификация
 
@@ -139,6 +257,38 @@ SIMPLE_JWT = {
 
 CONFIRMATION_CODE_LEN = 10
 
+# Срок действия кода подтверждения в секундах и число попыток ввода.
+CONFIRMATION_CODE_TTL = 24 * 60 * 60
+
+CONFIRMATION_CODE_MAX_ATTEMPTS = 5
+
+
+# Роль в токене доступа (users.authentication)
+
+# Добавлять в токен имя, роль и признак суперпользователя, чтобы
+# запросы с ним не читали пользователя из базы.
+AUTH_TOKEN_CLAIMS = True
+
+# Сколько секунд после выдачи токена доверять его утверждениям.
+AUTH_CLAIMS_MAX_AGE = 15 * 60
+
+# Кэш отметок об изменении ролей, без вытеснения записей. При
+# нескольких процессах нужен общий кэш (Redis без eviction), иначе
+# отзыв видит только один процесс и роль обновится не позже
+# AUTH_CLAIMS_MAX_AGE.
+AUTH_CLAIMS_CACHE_ALIAS = 'auth'
+
+
+# Кэш данных пользователя для аутентификации (users.user_cache)
+
+# Срок жизни записи в секундах и число записей в памяти процесса.
+USER_CACHE_TTL = 60
+
+USER_CACHE_MAXSIZE = 10000
+
+# Общий кэш Django второго уровня или None, чтобы не использовать.
+USER_CACHE_ALIAS = None
+
 
 # Email
 
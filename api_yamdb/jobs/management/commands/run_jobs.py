@@ -0,0 +1,83 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from jobs.services import due_job_ids, purge_jobs, run_job
+
+# Как часто удалять старые задачи, в секундах.
+PURGE_INTERVAL = 60 * 60
+
+
+def run_job_in_thread(job_id):
+    # У каждого потока свое соединение с базой, закрываем его сами.
+    try:
+        return run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=100,
+            help='Сколько задач выбирать из очереди за раз.',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=1,
+            help='Число потоков-обработчиков.',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+
+    def handle(self, *args, **options):
+        executor = None
+        if options['threads'] > 1:
+            executor = ThreadPoolExecutor(max_workers=options['threads'])
+        done = failed = purged = 0
+        purged_at = None
+        try:
+            while True:
+                close_old_connections()
+                now = time.monotonic()
+                if purged_at is None or now - purged_at > PURGE_INTERVAL:
+                    purged += purge_jobs()
+                    purged_at = now
+                job_ids = due_job_ids(options['batch'])
+                if executor is None:
+                    results = [run_job(job_id) for job_id in job_ids]
+                else:
+                    results = list(executor.map(run_job_in_thread, job_ids))
+                done += results.count(True)
+                failed += results.count(False)
+                if not job_ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Выполнено задач: {done}, с ошибкой или пропущено: {failed}, '
+                f'удалено старых: {purged}'
+            )
+        )
@@ -0,0 +1,21 @@
+"""Реестр обработчиков фоновых задач по имени."""
+_handlers = {}
+
+
+def job(name):
+    """Регистрирует функцию как обработчик задач name.
+    Аргументы задачи передаются ей именованными параметрами.
+    Обработчик может быть вызван повторно и должен это переносить."""
+    def register(handler):
+        if name in _handlers:
+            raise ValueError(f'Обработчик {name} уже зарегистрирован.')
+        _handlers[name] = handler
+        return handler
+    return register
+
+
+def get_handler(name):
+    try:
+        return _handlers[name]
+    except KeyError:
+        raise LookupError(f'Нет обработчика задач {name}.')
@@ -0,0 +1,124 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+from .registry import get_handler
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(name, key=None, delay=0, **payload):
+    """Ставит задачу name с аргументами payload в очередь.
+
+    Вызывается внутри транзакции основной записи: задача появится
+    только вместе с ней. Пока задача с ключом key ждет обработчика,
+    новая с тем же ключом не создается, возвращается ожидающая:
+    так серия одинаковых задач сливается в одну без записи в базу.
+    Ключ освобождается, когда задачу берут в работу (claim_job)."""
+    get_handler(name)
+    if key is not None:
+        pending = Job.objects.filter(idempotency_key=key).first()
+        if pending is not None:
+            return pending
+    fields = {
+        'name': name,
+        'payload': json.dumps(payload),
+        'run_at': timezone.now() + timedelta(seconds=delay),
+    }
+    if key is None:
+        job = Job.objects.create(**fields)
+    else:
+        try:
+            with transaction.atomic():
+                job = Job.objects.create(idempotency_key=key, **fields)
+        except IntegrityError:
+            return Job.objects.get(idempotency_key=key)
+    if settings.JOBS_EAGER and not delay:
+        transaction.on_commit(lambda: run_job(job.pk))
+    return job
+
+
+def claimable(now):
+    """Задачи, которые можно взять: ожидающие своего времени
+    и зависшие, чья аренда истекла (упавший обработчик)."""
+    return (
+        Q(status=Job.PENDING, run_at__lte=now)
+        | Q(status=Job.RUNNING, locked_until__lt=now)
+    )
+
+
+def due_job_ids(limit):
+    return list(
+        Job.objects.filter(claimable(timezone.now()))
+        .order_by('run_at', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+
+
+def claim_job(job_id):
+    """Берет задачу в работу условным UPDATE: из нескольких
+    обработчиков задачу получит только один. Ключ идемпотентности
+    снимается: изменения после начала работы требуют новой задачи."""
+    now = timezone.now()
+    return bool(
+        Job.objects.filter(claimable(now), pk=job_id).update(
+            status=Job.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=settings.JOBS_LEASE),
+            idempotency_key=None,
+        )
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная пауза перед повтором."""
+    return settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def run_job(job_id):
+    """Выполняет задачу, если ее удалось взять. При ошибке задача
+    откладывается на retry_delay или, если попытки кончились,
+    помечается как неудачная. Возвращает True при успехе."""
+    if not claim_job(job_id):
+        return False
+    job = Job.objects.get(pk=job_id)
+    try:
+        with transaction.atomic():
+            get_handler(job.name)(**job.get_payload())
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', job)
+        now = timezone.now()
+        failed = job.attempts >= job.max_attempts
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.FAILED if failed else Job.PENDING,
+            run_at=now + timedelta(seconds=retry_delay(job.attempts)),
+            locked_until=None,
+            last_error=traceback.format_exc(),
+            finished=now if failed else None,
+        )
+        return False
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.DONE,
+        locked_until=None,
+        finished=timezone.now(),
+    )
+    return True
+
+
+def purge_jobs():
+    """Удаляет выполненные и неудачные задачи, завершенные раньше
+    JOBS_RETENTION секунд назад. Возвращает число удаленных."""
+    deleted, _ = Job.objects.filter(
+        status__in=(Job.DONE, Job.FAILED),
+        finished__lt=timezone.now() - timedelta(
+            seconds=settings.JOBS_RETENTION
+        ),
+    ).delete()
+    return deleted
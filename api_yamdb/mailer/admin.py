@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    # Текст письма содержит код подтверждения и в админке не показывается.
+    exclude = ('body',)
+    list_display = ('subject', 'to', 'status', 'attempts', 'created')
+    list_filter = ('status',)
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from mailer.services import deliver_outbox, purge_outbox
+
+# Как часто удалять старые письма, в секундах.
+PURGE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из исходящей очереди.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить готовые письма и завершиться.',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=None,
+            help='Сколько писем отправлять через одно соединение '
+                 '(по умолчанию MAILER_BATCH_SIZE).',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+
+    def handle(self, *args, **options):
+        claimed = purged = 0
+        purged_at = None
+        try:
+            while True:
+                close_old_connections()
+                now = time.monotonic()
+                if purged_at is None or now - purged_at > PURGE_INTERVAL:
+                    purged += purge_outbox()
+                    purged_at = now
+                count = deliver_outbox(options['batch'])
+                claimed += count
+                if not count:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Обработано писем: {claimed}, удалено старых: {purged}'
+            )
+        )
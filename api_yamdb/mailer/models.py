@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import models
+from django.utils import timezone
+
+
+def default_max_attempts():
+    return settings.MAILER_MAX_ATTEMPTS
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в исходящей очереди.
+
+    Записывается в транзакции запроса и отправляется после ее
+    фиксации пачками через одно соединение: сразу в том же процессе
+    (MAILER_EAGER) или командой send_outbox. После отправки или
+    последней неудачной попытки текст стирается, а через
+    MAILER_RETENTION запись удаляется.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Ожидает'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Ошибка'),
+    ]
+    subject = models.CharField(
+        max_length=255,
+        verbose_name='Тема',
+    )
+    body = models.TextField(
+        verbose_name='Текст',
+    )
+    from_email = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='Отправитель',
+    )
+    to = models.TextField(
+        verbose_name='Получатели (по одному в строке)',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток',
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=default_max_attempts,
+        verbose_name='Максимум попыток',
+    )
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отправить после',
+    )
+    claimed_by = models.CharField(
+        max_length=32,
+        blank=True,
+        verbose_name='Отправитель пачки',
+    )
+    locked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Занято до',
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка',
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано',
+    )
+    sent = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Отправлено',
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            models.Index(
+                fields=('status', 'send_after'),
+                name='outgoing_status_send_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.to} ({self.status})'
+
+    def get_message(self, connection):
+        return EmailMessage(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email or None,
+            to=self.to.splitlines(),
+            connection=connection,
+        )
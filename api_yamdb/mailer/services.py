@@ -0,0 +1,135 @@
+import logging
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def queue_mail(subject, body, to, from_email=''):
+    """Ставит письмо в исходящую очередь.
+
+    Вызывается внутри транзакции основной записи: письмо уйдет только
+    вместе с ней и не задержит запрос сетевым обменом с SMTP."""
+    message = OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        to='\n'.join(to),
+    )
+    if settings.MAILER_EAGER:
+        transaction.on_commit(deliver_outbox)
+    return message
+
+
+def claimable(now):
+    """Письма, которые можно взять: ожидающие своего времени
+    и зависшие, чья аренда истекла (упавший отправитель)."""
+    return (
+        Q(status=OutgoingEmail.PENDING, send_after__lte=now)
+        | Q(status=OutgoingEmail.SENDING, locked_until__lt=now)
+    )
+
+
+def claim_batch(limit):
+    """Закрепляет за отправителем до limit писем условным UPDATE
+    и возвращает их. Параллельный отправитель те же письма не получит."""
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due_ids = list(
+        OutgoingEmail.objects.filter(claimable(now))
+        .order_by('send_after', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+    if not due_ids:
+        return []
+    OutgoingEmail.objects.filter(claimable(now), pk__in=due_ids).update(
+        status=OutgoingEmail.SENDING,
+        attempts=F('attempts') + 1,
+        claimed_by=token,
+        locked_until=now + timedelta(seconds=settings.MAILER_LEASE),
+    )
+    return list(
+        OutgoingEmail.objects.filter(
+            claimed_by=token, status=OutgoingEmail.SENDING
+        ).order_by('id')
+    )
+
+
+def retry_delay(attempts):
+    """Экспоненциальная пауза перед повтором."""
+    return settings.MAILER_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def defer(message, error):
+    """Откладывает письмо на retry_delay или, если попытки
+    кончились, помечает его как неудачное и стирает текст."""
+    if message.attempts >= message.max_attempts:
+        fields = {'status': OutgoingEmail.FAILED, 'body': ''}
+    else:
+        fields = {'status': OutgoingEmail.PENDING}
+    OutgoingEmail.objects.filter(pk=message.pk).update(
+        send_after=timezone.now() + timedelta(
+            seconds=retry_delay(message.attempts)
+        ),
+        locked_until=None,
+        last_error=error,
+        **fields
+    )
+
+
+def deliver_outbox(limit=None):
+    """Отправляет пачку готовых писем через одно соединение
+    с почтовым сервером. Возвращает число взятых писем."""
+    messages = claim_batch(limit or settings.MAILER_BATCH_SIZE)
+    if not messages:
+        return 0
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception:
+        logger.exception('Не удалось подключиться к почтовому серверу')
+        error = traceback.format_exc()
+        for message in messages:
+            defer(message, error)
+        return len(messages)
+    sent_ids = []
+    try:
+        for message in messages:
+            try:
+                message.get_message(connection).send()
+            except Exception:
+                logger.exception('Письмо %s не отправлено', message.pk)
+                defer(message, traceback.format_exc())
+            else:
+                sent_ids.append(message.pk)
+    finally:
+        connection.close()
+    # Текст писем (в нем коды подтверждения) после отправки не хранится.
+    OutgoingEmail.objects.filter(pk__in=sent_ids).update(
+        status=OutgoingEmail.SENT,
+        body='',
+        locked_until=None,
+        sent=timezone.now(),
+    )
+    return len(messages)
+
+
+def purge_outbox():
+    """Удаляет отправленные и неудачные письма старше
+    MAILER_RETENTION секунд. Возвращает число удаленных."""
+    deleted, _ = OutgoingEmail.objects.filter(
+        status__in=(OutgoingEmail.SENT, OutgoingEmail.FAILED),
+        created__lt=timezone.now() - timedelta(
+            seconds=settings.MAILER_RETENTION
+        ),
+    ).delete()
+    return deleted
@@ -0,0 +1,7 @@
+from jobs.registry import job
+from .services import refresh_title_rankings
+
+
+@job('reviews.refresh_title_rankings')
+def refresh_title_rankings_job(title_ids):
+    refresh_title_rankings(title_ids)
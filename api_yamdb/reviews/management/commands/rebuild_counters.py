@@ -0,0 +1,44 @@
+from functools import partial
+
+from django.core.management.base import BaseCommand
+
+from reviews.models import Review, Title
+from reviews.services import (find_drifted, find_drifted_histograms,
+                              rebuild_review_comment_counts,
+                              rebuild_score_histograms, rebuild_title_ratings,
+                              review_counters, title_counters)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет денормализованные счетчики произведений и отзывов '
+        'с данными и пересчитывает разошедшиеся.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать расхождения, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        counters = (
+            ('произведений',
+             partial(find_drifted, Title.objects.all(), title_counters()),
+             rebuild_title_ratings),
+            ('отзывов',
+             partial(find_drifted, Review.objects.all(), review_counters()),
+             rebuild_review_comment_counts),
+            ('распределений оценок', find_drifted_histograms,
+             rebuild_score_histograms),
+        )
+        for label, find, rebuild in counters:
+            drifted = find()
+            if drifted and not options['dry_run']:
+                rebuild(drifted)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Расхождения в счетчиках {label}: {len(drifted)}'
+                )
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from reviews.services import rebuild_title_rankings
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает с нуля рейтинг произведений для топа.'
+
+    def handle(self, *args, **options):
+        ranked = rebuild_title_rankings()
+        self.stdout.write(
+            self.style.SUCCESS(f'Произведений в рейтинге: {ranked}')
+        )
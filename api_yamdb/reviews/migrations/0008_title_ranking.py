@@ -0,0 +1,51 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_rankings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    prior_weight = settings.RATING_PRIOR_WEIGHT
+    prior_sum = settings.RATING_PRIOR_MEAN * prior_weight
+    titles = Title.objects.filter(review_count__gt=0).values_list(
+        'id', 'score_sum', 'review_count'
+    )
+    TitleRanking.objects.bulk_create(
+        [
+            TitleRanking(
+                title_id=title_id,
+                score=(score_sum + prior_sum) / (review_count + prior_weight)
+            )
+            for title_id, score_sum, review_count in titles.iterator()
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_title_fts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='reviews.Title', verbose_name='Произведение')),
+                ('score', models.FloatField(verbose_name='Взвешенная оценка')),
+            ],
+            options={
+                'verbose_name': 'Позиция в рейтинге',
+                'verbose_name_plural': 'Рейтинг произведений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['-score', 'title'], name='ranking_score_title_idx'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
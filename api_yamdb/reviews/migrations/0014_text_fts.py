@@ -0,0 +1,77 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:20
+
+from django.db import migrations
+
+# SQL записан в миграции целиком: изменения reviews.search
+# не должны менять то, что делает уже примененная миграция.
+CREATE_SQL = tuple(
+    sql.format(table=table)
+    for table in ('reviews_review', 'reviews_comment')
+    for sql in (
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+            text,
+            content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_insert
+        AFTER INSERT ON {table} BEGIN
+            INSERT INTO {table}_fts(rowid, text) VALUES (new.id, new.text);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_delete
+        AFTER DELETE ON {table} BEGIN
+            INSERT INTO {table}_fts({table}_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_update
+        AFTER UPDATE OF text ON {table} BEGIN
+            INSERT INTO {table}_fts({table}_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+            INSERT INTO {table}_fts(rowid, text) VALUES (new.id, new.text);
+        END
+        """,
+        "INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')",
+    )
+)
+
+DROP_SQL = tuple(
+    sql.format(table=table)
+    for table in ('reviews_review', 'reviews_comment')
+    for sql in (
+        'DROP TRIGGER IF EXISTS {table}_fts_insert',
+        'DROP TRIGGER IF EXISTS {table}_fts_delete',
+        'DROP TRIGGER IF EXISTS {table}_fts_update',
+        'DROP TABLE IF EXISTS {table}_fts',
+    )
+)
+
+
+def create_text_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_text_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0013_author_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_text_fts, drop_text_fts),
+    ]
@@ -1,9 +1,13 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 
 User = get_user_model()
 
+MIN_SCORE = 1
+MAX_SCORE = 10
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
+
 
 class Category(models.Model):
     """Модель категорий произведений."""
@@ -71,15 +75,117 @@ class Title(models.Model):
         on_delete=models.SET_NULL,
         related_name='titles'
     )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок',
+    )
+    review_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество отзывов',
+    )
 
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
         ordering = ('name', )
+        indexes = [
+            models.Index(fields=('name', 'id'), name='title_name_id_idx'),
+        ]
 
     def __str__(self):
         return self.name[:50]
 
+    @property
+    def rating(self):
+        """Средняя оценка произведения или None, если отзывов нет."""
+        if not self.review_count:
+            return None
+        return self.score_sum / self.review_count
+
+
+class TitleRanking(models.Model):
+    """Материализованный рейтинг произведений для топа.
+
+    Хранит байесовскую взвешенную оценку произведения с отзывами,
+    чтобы топ читался по индексу, а не сортировкой средних оценок.
+    """
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        related_name='ranking'
+    )
+    score = models.FloatField(
+        verbose_name='Взвешенная оценка',
+    )
+
+    class Meta:
+        verbose_name = 'Позиция в рейтинге'
+        verbose_name_plural = 'Рейтинг произведений'
+        indexes = [
+            models.Index(
+                fields=('-score', 'title'), name='ranking_score_title_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score:.2f}'
+
+
+class ScoreHistogram(models.Model):
+    """Распределение оценок видимых отзывов произведения:
+    по столбцу на каждую оценку от MIN_SCORE до MAX_SCORE.
+
+    Обновляется на разницу при записи отзывов, поэтому статистика
+    произведения читается одной строкой без GROUP BY по отзывам.
+    Строка создается при первом отзыве.
+    """
+    title = models.OneToOneField(
+        Title,
+        primary_key=True,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        related_name='score_histogram'
+    )
+    score_1 = models.PositiveIntegerField(default=0, verbose_name='Оценок 1')
+    score_2 = models.PositiveIntegerField(default=0, verbose_name='Оценок 2')
+    score_3 = models.PositiveIntegerField(default=0, verbose_name='Оценок 3')
+    score_4 = models.PositiveIntegerField(default=0, verbose_name='Оценок 4')
+    score_5 = models.PositiveIntegerField(default=0, verbose_name='Оценок 5')
+    score_6 = models.PositiveIntegerField(default=0, verbose_name='Оценок 6')
+    score_7 = models.PositiveIntegerField(default=0, verbose_name='Оценок 7')
+    score_8 = models.PositiveIntegerField(default=0, verbose_name='Оценок 8')
+    score_9 = models.PositiveIntegerField(default=0, verbose_name='Оценок 9')
+    score_10 = models.PositiveIntegerField(
+        default=0, verbose_name='Оценок 10'
+    )
+
+    class Meta:
+        verbose_name = 'Распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+
+    def __str__(self):
+        return f'{self.title_id}: {self.counts()}'
+
+    @staticmethod
+    def field_name(score):
+        return f'score_{score}'
+
+    def counts(self):
+        """Число отзывов с каждой оценкой, по возрастанию оценки."""
+        return [getattr(self, self.field_name(score)) for score in SCORES]
+
+
+class PublicationQuerySet(models.QuerySet):
+    """Отзывы и комментарии: скрытые модератором записи
+    остаются в базе, но не показываются и не учитываются в счетчиках."""
+
+    def visible(self):
+        return self.filter(is_hidden=False)
+
 
 class Review(models.Model):
     """Модель отзывов к произведениям."""
@@ -101,18 +207,51 @@ class Review(models.Model):
     score = models.IntegerField(
         verbose_name='Рейтинг',
         validators=[
-            MinValueValidator(1),
-            MaxValueValidator(10)
+            MinValueValidator(MIN_SCORE),
+            MaxValueValidator(MAX_SCORE)
         ]
     )
     pub_date = models.DateTimeField(
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев',
+    )
+    is_hidden = models.BooleanField(
+        default=False,
+        verbose_name='Скрыт модератором',
+    )
+
+    objects = PublicationQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:50]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_counted_state()
+        return instance
+
+    def remember_counted_state(self):
+        """Запоминает произведение, оценку и видимость, учтенные
+        в счетчиках произведения. Нужно, чтобы при изменении отзыва
+        поправить сумму оценок на разницу, не пересчитывая ее целиком."""
+        loaded = self.get_deferred_fields()
+        if loaded & {'title_id', 'score', 'is_hidden'}:
+            self._counted_state = None
+        else:
+            self._counted_state = (self.title_id, self.score, self.is_hidden)
+
+    def save(self, *args, **kwargs):
+        # Счетчики произведения обновляются обработчиком post_save,
+        # поэтому сохраняем отзыв и счетчики в одной транзакции.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
@@ -122,6 +261,16 @@ class Review(models.Model):
                 name='unique_title_author'
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=('title', '-pub_date', '-id'),
+                name='review_title_pub_date_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='review_author_pub_date_idx'
+            ),
+        ]
         ordering = ('-pub_date', )
 
 
@@ -146,11 +295,47 @@ class Comment(models.Model):
         verbose_name='Дата публикации',
         auto_now_add=True
     )
+    is_hidden = models.BooleanField(
+        default=False,
+        verbose_name='Скрыт модератором',
+    )
+
+    objects = PublicationQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:50]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_counted_state()
+        return instance
+
+    def remember_counted_state(self):
+        """Запоминает отзыв и видимость комментария, учтенные
+        в счетчике комментариев отзыва."""
+        loaded = self.get_deferred_fields()
+        if 'review_id' in loaded or 'is_hidden' in loaded:
+            self._counted_state = None
+        else:
+            self._counted_state = (self.review_id, self.is_hidden)
+
+    def save(self, *args, **kwargs):
+        # Счетчик комментариев отзыва обновляется обработчиком post_save.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='comment_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('review', '-pub_date', '-id'),
+                name='comment_review_pub_date_idx'
+            ),
+        ]
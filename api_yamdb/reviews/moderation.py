@@ -0,0 +1,106 @@
+"""Массовая модерация отзывов и комментариев.
+
+Записи выбираются и удаляются или скрываются запросами над множеством
+строк, без загрузки моделей и сигналов на каждую строку. Счетчики,
+распределения оценок и рейтинг затронутых произведений и отзывов
+пересчитываются один раз на произведение (отзыв) после изменения,
+а вместо сигналов моделей отправляется один сигнал moderated.
+"""
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.dispatch import Signal
+
+from jobs.services import enqueue
+from .models import Comment, Review
+from .services import (rebuild_review_comment_counts,
+                       rebuild_score_histograms, rebuild_title_ratings)
+
+DELETE = 'delete'
+HIDE = 'hide'
+UNHIDE = 'unhide'
+ACTIONS = (DELETE, HIDE, UNHIDE)
+
+ModerationResult = namedtuple('ModerationResult', ('reviews', 'comments'))
+ModerationResult.__doc__ = """Затронутые записи: reviews - пары
+(id, title_id), comments - тройки (id, review_id, title_id)."""
+
+# Отправляется внутри транзакции модерации с action и result
+# (ModerationResult): по нему сбрасываются кэши затронутых записей.
+moderated = Signal(providing_args=['action', 'result'])
+
+
+def delete_rows(model, column, values):
+    """Удаляет строки model, у которых column входит в values, одним
+    DELETE на пачку значений: без сбора каскада и сигналов post_delete
+    на каждую строку."""
+    values = list(values)
+    if not values:
+        return
+    quote = connection.ops.quote_name
+    table, column = quote(model._meta.db_table), quote(column)
+    size = connection.ops.bulk_batch_size([column], values)
+    with connection.cursor() as cursor:
+        for start in range(0, len(values), size):
+            batch = values[start:start + size]
+            cursor.execute(
+                f'DELETE FROM {table} WHERE {column} IN '
+                f'({", ".join(["%s"] * len(batch))})',
+                batch
+            )
+
+
+def moderate(action, review_ids=(), comment_ids=(), authors=()):
+    """Удаляет, скрывает или показывает отзывы review_ids,
+    комментарии comment_ids и все отзывы и комментарии пользователей
+    с именами authors. При удалении отзыва удаляются и его комментарии."""
+    if action not in ACTIONS:
+        raise ValueError(f'Неизвестное действие: {action}')
+    reviews = Review.objects.filter(
+        Q(pk__in=review_ids) | Q(author__username__in=authors)
+    )
+    comments = Comment.objects.filter(
+        Q(pk__in=comment_ids) | Q(author__username__in=authors)
+    )
+    if action == DELETE:
+        comments = Comment.objects.filter(
+            Q(pk__in=comments.values('pk')) | Q(review__in=reviews)
+        )
+    with transaction.atomic():
+        result = ModerationResult(
+            reviews=list(reviews.order_by().values_list('id', 'title_id')),
+            comments=list(comments.order_by().values_list(
+                'id', 'review_id', 'review__title_id'
+            )),
+        )
+        if action == DELETE:
+            # Удаляются ровно отобранные в result строки. Комментарии
+            # удаляются первыми, включая добавленные к удаляемым
+            # отзывам после выборки.
+            review_pks = [pk for pk, _ in result.reviews]
+            delete_rows(Comment, 'id', [pk for pk, _, _ in result.comments])
+            delete_rows(Comment, 'review_id', review_pks)
+            delete_rows(Review, 'id', review_pks)
+        else:
+            is_hidden = action == HIDE
+            comments.update(is_hidden=is_hidden)
+            reviews.update(is_hidden=is_hidden)
+
+        deleted_reviews = (
+            {pk for pk, _ in result.reviews} if action == DELETE else set()
+        )
+        title_ids = {title_id for _, title_id in result.reviews}
+        review_ids = {
+            review_id for _, review_id, _ in result.comments
+        } - deleted_reviews
+        if title_ids:
+            rebuild_title_ratings(title_ids)
+            rebuild_score_histograms(title_ids)
+            enqueue(
+                'reviews.refresh_title_rankings', title_ids=sorted(title_ids)
+            )
+        if review_ids:
+            rebuild_review_comment_counts(review_ids)
+        moderated.send(sender=ModerationResult, action=action, result=result)
+    return result
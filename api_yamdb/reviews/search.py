@@ -0,0 +1,201 @@
+"""Полнотекстовый поиск по произведениям, отзывам и комментариям
+на SQLite FTS5.
+
+Индексы хранят только токены (external content), строки берутся
+из таблиц моделей. Синхронизацию при записи выполняют триггеры базы,
+поэтому индекс не расходится с таблицей и при массовых операциях
+в обход ORM.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+
+# snippet() отмечает найденные слова управляющими символами, которых
+# нет в экранированном тексте; render_snippet заменяет их тегами.
+SNIPPET_MARK_START = '\x02'
+SNIPPET_MARK_END = '\x03'
+SNIPPET_START = '<mark>'
+SNIPPET_END = '</mark>'
+SNIPPET_ELLIPSIS = '…'
+SNIPPET_TOKENS = 16
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+class FtsIndex:
+    """Описание индекса FTS5 над колонками таблицы content_table.
+
+    Индекс хранит только токены (external content), строки берутся
+    из content_table по rowid = id. Триггеры синхронизируют индекс
+    при вставке, удалении и изменении индексируемых колонок.
+    """
+
+    def __init__(self, table, content_table, columns):
+        self.table = table
+        self.content_table = content_table
+        self.columns = tuple(columns)
+
+    @property
+    def create_sql(self):
+        return f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5(
+                {', '.join(self.columns)},
+                content='{self.content_table}', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """
+
+    @property
+    def triggers(self):
+        columns = ', '.join(self.columns)
+        new = ', '.join(f'new.{column}' for column in self.columns)
+        old = ', '.join(f'old.{column}' for column in self.columns)
+        insert = f"""
+            INSERT INTO {self.table}(rowid, {columns})
+            VALUES (new.id, {new});
+        """
+        delete = f"""
+            INSERT INTO {self.table}({self.table}, rowid, {columns})
+            VALUES ('delete', old.id, {old});
+        """
+        return {
+            f'{self.table}_insert': f"""
+                CREATE TRIGGER IF NOT EXISTS {self.table}_insert
+                AFTER INSERT ON {self.content_table} BEGIN {insert} END
+            """,
+            f'{self.table}_delete': f"""
+                CREATE TRIGGER IF NOT EXISTS {self.table}_delete
+                AFTER DELETE ON {self.content_table} BEGIN {delete} END
+            """,
+            f'{self.table}_update': f"""
+                CREATE TRIGGER IF NOT EXISTS {self.table}_update
+                AFTER UPDATE OF {columns} ON {self.content_table}
+                BEGIN {delete} {insert} END
+            """,
+        }
+
+    def install(self, connection):
+        """Создает индекс и триггеры, если их нет, и перестраивает индекс,
+        если триггеры пропали. SQLite удаляет триггеры вместе с таблицей,
+        а миграции пересоздают таблицу при изменении ее схемы."""
+        if not supports_fts(connection):
+            return
+        triggers = self.triggers
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = %s",
+                [self.content_table]
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            if existing.issuperset(triggers):
+                return
+            cursor.execute(self.create_sql)
+            for sql in triggers.values():
+                cursor.execute(sql)
+            cursor.execute(
+                f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')"
+            )
+
+    def drop(self, schema_editor):
+        if not supports_fts(schema_editor.connection):
+            return
+        for trigger in self.triggers:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+
+TITLE_FTS = FtsIndex(
+    'reviews_title_fts', 'reviews_title', ('name', 'description')
+)
+REVIEW_FTS = FtsIndex('reviews_review_fts', 'reviews_review', ('text',))
+COMMENT_FTS = FtsIndex('reviews_comment_fts', 'reviews_comment', ('text',))
+FTS_INDEXES = (TITLE_FTS, REVIEW_FTS, COMMENT_FTS)
+
+
+def supports_fts(connection):
+    return connection.vendor == 'sqlite'
+
+
+def restore_fts_indexes(connection):
+    """Восстанавливает триггеры установленных миграциями индексов."""
+    if not supports_fts(connection):
+        return
+    tables = connection.introspection.table_names()
+    for index in FTS_INDEXES:
+        if index.table in tables:
+            index.install(connection)
+
+
+def build_match_query(text):
+    """Превращает строку поиска в запрос FTS5: каждое слово ищется
+    как префикс, все слова должны встретиться (AND)."""
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(text))
+
+
+def search_titles(queryset, text):
+    """Отбирает произведения по словам из text и сортирует их по
+    релевантности (bm25), при равенстве - по id."""
+    match = build_match_query(text)
+    if not match:
+        return queryset
+    if not supports_fts(connection):
+        return queryset.filter(
+            Q(name__icontains=text) | Q(description__icontains=text)
+        )
+    return queryset.extra(
+        tables=[TITLE_FTS.table],
+        where=[
+            f'{TITLE_FTS.table}.rowid = reviews_title.id',
+            f'{TITLE_FTS.table} MATCH %s',
+        ],
+        params=[match],
+        select={'search_rank': f'{TITLE_FTS.table}.rank'},
+    ).order_by('search_rank', 'id')
+
+
+def search_texts(queryset, index, text):
+    """Отбирает отзывы или комментарии по словам из text через индекс
+    index и сортирует по релевантности. Добавляет колонки search_rank
+    и snippet - фрагмент текста с найденными словами, отмеченными
+    SNIPPET_MARK_START и SNIPPET_MARK_END (см. render_snippet)."""
+    match = build_match_query(text)
+    if not match:
+        return queryset.extra(
+            select={'search_rank': '0', 'snippet': 'NULL'}
+        ).none()
+    if not supports_fts(connection):
+        return queryset.filter(**{
+            f'{index.columns[0]}__icontains': text
+        }).extra(
+            select={'search_rank': '0', 'snippet': 'NULL'}
+        ).order_by('-pub_date', '-id')
+    return queryset.extra(
+        tables=[index.table],
+        where=[
+            f'{index.table}.rowid = {index.content_table}.id',
+            f'{index.table} MATCH %s',
+        ],
+        params=[match],
+        select={
+            'search_rank': f'{index.table}.rank',
+            'snippet': (
+                f"snippet({index.table}, 0, "
+                f"char({ord(SNIPPET_MARK_START)}), "
+                f"char({ord(SNIPPET_MARK_END)}), "
+                f"'{SNIPPET_ELLIPSIS}', {SNIPPET_TOKENS})"
+            ),
+        },
+    ).order_by('search_rank', 'id')
+
+
+def render_snippet(snippet):
+    """HTML фрагмента из search_texts: текст пользователя экранируется,
+    найденные слова оборачиваются в SNIPPET_START и SNIPPET_END."""
+    if snippet is None:
+        return None
+    return escape(snippet).replace(
+        SNIPPET_MARK_START, SNIPPET_START
+    ).replace(SNIPPET_MARK_END, SNIPPET_END)
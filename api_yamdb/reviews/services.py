@@ -0,0 +1,272 @@
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import (Count, F, OuterRef, Q, Subquery, Sum,
+                              Window)
+from django.db.models.functions import Coalesce, RowNumber
+
+from .models import (SCORES, Comment, Review, ScoreHistogram, Title,
+                     TitleRanking)
+
+
+def change_title_rating(title_id, score_delta, count_delta):
+    """Сдвигает сумму оценок и число отзывов произведения
+    на заданные величины одним UPDATE без чтения строки."""
+    Title.objects.filter(pk=title_id).update(
+        score_sum=F('score_sum') + score_delta,
+        review_count=F('review_count') + count_delta,
+    )
+
+
+def change_review_comment_count(review_id, delta):
+    Review.objects.filter(pk=review_id).update(
+        comment_count=F('comment_count') + delta
+    )
+
+
+def title_counters():
+    """Выражения, пересчитывающие счетчики произведения по отзывам."""
+    reviews = (
+        Review.objects
+        .visible()
+        .filter(title=OuterRef('pk'))
+        .order_by()
+        .values('title')
+    )
+    return {
+        'score_sum': Coalesce(
+            Subquery(reviews.annotate(total=Sum('score')).values('total')),
+            0
+        ),
+        'review_count': Coalesce(
+            Subquery(reviews.annotate(total=Count('pk')).values('total')),
+            0
+        ),
+    }
+
+
+def review_counters():
+    """Выражения, пересчитывающие счетчики отзыва по комментариям."""
+    comments = (
+        Comment.objects
+        .visible()
+        .filter(review=OuterRef('pk'))
+        .order_by()
+        .values('review')
+    )
+    return {
+        'comment_count': Coalesce(
+            Subquery(comments.annotate(total=Count('pk')).values('total')),
+            0
+        ),
+    }
+
+
+def find_drifted(queryset, counters):
+    """Возвращает id строк, счетчики которых разошлись с пересчетом."""
+    actual = {f'actual_{name}': expr for name, expr in counters.items()}
+    mismatch = reduce(or_, (
+        ~Q(**{name: F(f'actual_{name}')}) for name in counters
+    ))
+    return list(
+        queryset.annotate(**actual).filter(mismatch)
+        .values_list('pk', flat=True)
+    )
+
+
+def rebuild_title_ratings(title_ids=None):
+    """Пересчитывает сумму оценок и число видимых отзывов с нуля.
+    Если title_ids не передан, пересчитываются все произведения.
+    Возвращает количество обновленных произведений."""
+    titles = Title.objects.all()
+    if title_ids is not None:
+        titles = titles.filter(pk__in=title_ids)
+    return titles.update(**title_counters())
+
+
+def rebuild_review_comment_counts(review_ids=None):
+    """Пересчитывает число видимых комментариев отзывов с нуля."""
+    reviews = Review.objects.all()
+    if review_ids is not None:
+        reviews = reviews.filter(pk__in=review_ids)
+    return reviews.update(**review_counters())
+
+
+def change_score_histogram(title_id, deltas):
+    """Сдвигает столбцы распределения оценок произведения:
+    deltas сопоставляет оценке изменение числа отзывов с ней.
+    Строка распределения создается при первом отзыве."""
+    changes = {
+        ScoreHistogram.field_name(score): F(ScoreHistogram.field_name(score))
+        + delta
+        for score, delta in deltas.items() if delta
+    }
+    if not changes:
+        return
+    histograms = ScoreHistogram.objects.filter(pk=title_id)
+    if histograms.update(**changes) or min(deltas.values()) < 0:
+        return
+    try:
+        with transaction.atomic():
+            ScoreHistogram.objects.create(title_id=title_id, **{
+                ScoreHistogram.field_name(score): delta
+                for score, delta in deltas.items()
+            })
+    except IntegrityError:
+        # Строку успел создать параллельный запрос.
+        histograms.update(**changes)
+
+
+def count_scores(title_ids=None):
+    """Считает распределение оценок видимых отзывов GROUP BY-запросом:
+    {id произведения: список числа отзывов по оценкам}."""
+    reviews = Review.objects.visible()
+    if title_ids is not None:
+        reviews = reviews.filter(title_id__in=title_ids)
+    rows = reviews.order_by().values_list('title_id', 'score').annotate(
+        total=Count('pk')
+    )
+    histograms = {}
+    for title_id, score, total in rows.iterator():
+        counts = histograms.setdefault(title_id, [0] * len(SCORES))
+        counts[score - SCORES.start] = total
+    return histograms
+
+
+def find_drifted_histograms():
+    """Возвращает id произведений, распределение оценок которых
+    разошлось с пересчетом по отзывам."""
+    empty = [0] * len(SCORES)
+    stored = {
+        histogram.title_id: histogram.counts()
+        for histogram in ScoreHistogram.objects.iterator()
+    }
+    actual = count_scores()
+    return sorted(
+        title_id for title_id in stored.keys() | actual.keys()
+        if stored.get(title_id, empty) != actual.get(title_id, empty)
+    )
+
+
+@transaction.atomic
+def rebuild_score_histograms(title_ids=None, batch_size=1000):
+    """Пересчитывает распределения оценок произведений с нуля."""
+    histograms = ScoreHistogram.objects.all()
+    if title_ids is not None:
+        histograms = histograms.filter(title_id__in=title_ids)
+    histograms.delete()
+    rows = [
+        ScoreHistogram(title_id=title_id, **{
+            ScoreHistogram.field_name(score): count
+            for score, count in zip(SCORES, counts)
+        })
+        for title_id, counts in count_scores(title_ids).items()
+    ]
+    ScoreHistogram.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def score_stats(counts):
+    """Статистика по распределению оценок counts (число отзывов
+    с каждой оценкой из SCORES): число отзывов, средняя и медиана."""
+    total = sum(counts)
+    stats = {
+        'review_count': total,
+        'mean': None,
+        'median': None,
+        'distribution': {
+            str(score): count for score, count in zip(SCORES, counts)
+        },
+    }
+    if not total:
+        return stats
+    stats['mean'] = round(
+        sum(score * count for score, count in zip(SCORES, counts)) / total, 2
+    )
+    # Медиана - среднее двух средних позиций отсортированных оценок
+    # (для нечетного числа отзывов позиции совпадают).
+    middle = {(total - 1) // 2, total // 2}
+    found = []
+    seen = 0
+    for score, count in zip(SCORES, counts):
+        found.extend(
+            score for position in middle if seen <= position < seen + count
+        )
+        seen += count
+    stats['median'] = sum(found) / len(found)
+    return stats
+
+
+def weighted_rating(score_sum, review_count):
+    """Байесовская средняя: оценка произведения, притянутая к априорной
+    средней RATING_PRIOR_MEAN с весом RATING_PRIOR_WEIGHT отзывов.
+    Произведение с парой десяток не обгоняет сотню девяток."""
+    prior_weight = settings.RATING_PRIOR_WEIGHT
+    return (
+        (score_sum + settings.RATING_PRIOR_MEAN * prior_weight)
+        / (review_count + prior_weight)
+    )
+
+
+def ranking_rows(titles):
+    return [
+        TitleRanking(
+            title_id=title_id, score=weighted_rating(score_sum, review_count)
+        )
+        for title_id, score_sum, review_count in titles
+        if review_count
+    ]
+
+
+@transaction.atomic
+def refresh_title_rankings(title_ids):
+    """Пересчитывает позиции рейтинга произведений title_ids
+    по их счетчикам оценок."""
+    titles = Title.objects.filter(pk__in=title_ids).values_list(
+        'id', 'score_sum', 'review_count'
+    )
+    TitleRanking.objects.filter(title_id__in=title_ids).delete()
+    TitleRanking.objects.bulk_create(ranking_rows(titles))
+
+
+@transaction.atomic
+def rebuild_title_rankings(batch_size=1000):
+    """Перестраивает рейтинг всех произведений с нуля.
+    Возвращает количество произведений в рейтинге."""
+    TitleRanking.objects.all().delete()
+    titles = Title.objects.filter(review_count__gt=0).values_list(
+        'id', 'score_sum', 'review_count'
+    )
+    rows = ranking_rows(titles.iterator())
+    TitleRanking.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def latest_comments(review_ids, limit):
+    """Последние limit комментариев каждого из отзывов review_ids
+    одним запросом: ROW_NUMBER() по review_id, от новых к старым.
+
+    Django не умеет фильтровать по оконной функции, поэтому запрос
+    с нумерацией оборачивается в подзапрос с условием на номер.
+    Возвращает комментарии с атрибутом author_username в порядке
+    отзыва, а внутри отзыва - от новых к старым."""
+    if not review_ids or limit < 1:
+        return []
+    ranked = Comment.objects.visible().filter(
+        review_id__in=review_ids
+    ).annotate(
+        author_username=F('author__username'),
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('review_id')],
+            order_by=[F('pub_date').desc(), F('id').desc()],
+        ),
+    ).order_by()
+    sql, params = ranked.query.sql_with_params()
+    return list(Comment.objects.raw(
+        f'SELECT * FROM ({sql}) ranked WHERE ranked.row_number <= %s '
+        'ORDER BY ranked.review_id, ranked.row_number',
+        (*params, limit),
+    ))
@@ -0,0 +1,112 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from jobs.services import enqueue
+from .models import Comment, Review
+from .search import restore_fts_indexes
+from .services import (change_review_comment_count, change_score_histogram,
+                       change_title_rating, rebuild_review_comment_counts,
+                       rebuild_score_histograms, rebuild_title_ratings)
+
+
+def schedule_ranking_refresh(title_id):
+    # Фоновой задачей после фиксации транзакции: при каскадном удалении
+    # произведения его позиция в рейтинге не должна пересоздаваться.
+    # Пока задача по произведению ждет обработчика, новые с ней сливаются.
+    enqueue(
+        'reviews.refresh_title_rankings',
+        key=f'reviews.refresh_title_rankings:{title_id}',
+        title_ids=[title_id],
+    )
+
+
+def rating_share(title_id, score, is_hidden):
+    """Вклад отзыва в счетчики: (произведение, оценка) или None,
+    если отзыв скрыт и не учитывается."""
+    return None if is_hidden else (title_id, score)
+
+
+def move_rating_share(old, new):
+    """Переносит вклад отзыва в счетчики и распределение оценок
+    из old в new."""
+    if old == new:
+        return
+    if old is not None and new is not None and old[0] == new[0]:
+        change_title_rating(new[0], new[1] - old[1], 0)
+        change_score_histogram(new[0], {old[1]: -1, new[1]: 1})
+        return
+    if old is not None:
+        change_title_rating(old[0], -old[1], -1)
+        change_score_histogram(old[0], {old[1]: -1})
+        schedule_ranking_refresh(old[0])
+    if new is not None:
+        change_title_rating(new[0], new[1], 1)
+        change_score_histogram(new[0], {new[1]: 1})
+
+
+@receiver(post_save, sender=Review)
+def count_saved_review(sender, instance, created, **kwargs):
+    counted = getattr(instance, '_counted_state', None)
+    if not created and counted is None:
+        rebuild_title_ratings([instance.title_id])
+        rebuild_score_histograms([instance.title_id])
+    else:
+        move_rating_share(
+            None if created else rating_share(*counted),
+            rating_share(instance.title_id, instance.score,
+                         instance.is_hidden),
+        )
+    schedule_ranking_refresh(instance.title_id)
+    instance.remember_counted_state()
+
+
+@receiver(post_delete, sender=Review)
+def count_deleted_review(sender, instance, **kwargs):
+    counted = getattr(instance, '_counted_state', None) or (
+        instance.title_id, instance.score, instance.is_hidden
+    )
+    move_rating_share(rating_share(*counted), None)
+    schedule_ranking_refresh(counted[0])
+
+
+def comment_share(review_id, is_hidden):
+    """Отзыв, в счетчике которого учтен комментарий, или None."""
+    return None if is_hidden else review_id
+
+
+def move_comment_share(old, new):
+    if old == new:
+        return
+    if old is not None:
+        change_review_comment_count(old, -1)
+    if new is not None:
+        change_review_comment_count(new, 1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    counted = getattr(instance, '_counted_state', None)
+    if not created and counted is None:
+        rebuild_review_comment_counts([instance.review_id])
+    else:
+        move_comment_share(
+            None if created else comment_share(*counted),
+            comment_share(instance.review_id, instance.is_hidden),
+        )
+    instance.remember_counted_state()
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counted = getattr(instance, '_counted_state', None) or (
+        instance.review_id, instance.is_hidden
+    )
+    move_comment_share(comment_share(*counted), None)
+
+
+@receiver(post_migrate)
+def restore_fts(sender, using, **kwargs):
+    # Пересоздание таблицы в миграциях SQLite удаляет триггеры индексов.
+    if sender.name == 'reviews':
+        restore_fts_indexes(connections[using])
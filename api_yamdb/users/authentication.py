@@ -0,0 +1,130 @@
+"""Аутентификация по JWT без запроса к базе.
+
+Токен доступа, выданный issue_access_token, несет имя, роль и признак
+суперпользователя. По ним строится AuthUser, которого достаточно
+проверкам прав API. Утверждениям не доверяют, если токен выдан
+раньше AUTH_CLAIMS_MAX_AGE назад или до последнего изменения роли
+пользователя (revoke_claims): тогда данные пользователя берутся
+из user_cache, а при промахе - из базы.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.shortcuts import get_object_or_404
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .user_cache import user_cache
+
+User = get_user_model()
+
+CLAIMS = ('username', 'role', 'is_superuser')
+
+
+def revoked_key(user_id):
+    return f'auth:claims-revoked:{user_id}'
+
+
+def get_claims_cache():
+    return caches[settings.AUTH_CLAIMS_CACHE_ALIAS]
+
+
+def revoke_claims(user_id):
+    """Перестает доверять утверждениям уже выданных токенов
+    пользователя: их запросы снова читают пользователя из базы."""
+    get_claims_cache().set(
+        revoked_key(user_id),
+        int(time.time()),
+        timeout=int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()),
+    )
+
+
+def issue_access_token(user):
+    token = AccessToken.for_user(user)
+    if settings.AUTH_TOKEN_CLAIMS:
+        for claim in CLAIMS:
+            token[claim] = getattr(user, claim)
+    return token
+
+
+class AuthUser:
+    """Пользователь запроса без модели: из утверждений токена
+    или из кэша. Повторяет атрибуты User, которые читают проверки прав."""
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, id, username, role, is_superuser, is_active=True):
+        self.id = self.pk = id
+        self.username = username
+        self.role = role
+        self.is_superuser = is_superuser
+        self.is_active = is_active
+
+    @classmethod
+    def from_token(cls, token):
+        return cls(
+            token[api_settings.USER_ID_CLAIM],
+            **{claim: token[claim] for claim in CLAIMS}
+        )
+
+    def __str__(self):
+        return self.username
+
+    @property
+    def is_admin(self):
+        return self.is_superuser or self.role == User.ADMIN
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+
+def get_db_user(user):
+    """Модель пользователя для запроса, которому она нужна целиком."""
+    if isinstance(user, User):
+        return user
+    return get_object_or_404(User, pk=user.pk)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication, которая берет пользователя из утверждений
+    токена, если им можно доверять, и из user_cache - в остальных
+    случаях."""
+
+    def get_user(self, validated_token):
+        if self.trust_claims(validated_token):
+            return AuthUser.from_token(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _('Token contained no recognizable user identification')
+            )
+        data = user_cache.get(user_id)
+        if data is None:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found'
+            )
+        if not data['is_active']:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive'
+            )
+        return AuthUser(**data)
+
+    @staticmethod
+    def trust_claims(token):
+        if not all(claim in token for claim in CLAIMS):
+            return False
+        issued = token.get('iat', 0)
+        if time.time() - issued > settings.AUTH_CLAIMS_MAX_AGE:
+            return False
+        revoked = get_claims_cache().get(
+            revoked_key(token[api_settings.USER_ID_CLAIM])
+        )
+        return revoked is None or issued > revoked
@@ -33,6 +33,39 @@ class User(AbstractUser):
     class Meta:
         ordering = ('username', )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_claims()
+        instance.remember_username()
+        return instance
+
+    def get_claims(self):
+        """Поля, которые копируются в утверждения токена доступа."""
+        loaded = self.get_deferred_fields()
+        if loaded & {'role', 'is_superuser', 'is_active'}:
+            return None
+        return (self.role, self.is_superuser, self.is_active)
+
+    def remember_claims(self):
+        self._saved_claims = self.get_claims()
+
+    def claims_changed(self):
+        saved = getattr(self, '_saved_claims', None)
+        return saved is None or saved != self.get_claims()
+
+    def remember_username(self):
+        """Запоминает имя, под которым пользователь показан автором
+        в закэшированных ответах с отзывами и комментариями."""
+        if 'username' in self.get_deferred_fields():
+            self._saved_username = None
+        else:
+            self._saved_username = self.username
+
+    def username_changed(self):
+        saved = getattr(self, '_saved_username', None)
+        return saved is None or saved != self.username
+
     @property
     def is_admin(self):
         """Возвращает True, если пользователь
@@ -44,3 +77,22 @@ class User(AbstractUser):
         """Возвращает True, если пользователь
          исполняет роль "Модератор". Иначе False."""
         return self.role == self.MODERATOR
+
+
+class ConfirmationCode(models.Model):
+    """Код подтверждения для получения токена. Хранится только
+    HMAC кода; запись удаляется при первом успешном вводе."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='confirmation_code',
+        verbose_name='Пользователь'
+    )
+    code_hash = models.CharField('HMAC кода', max_length=64)
+    expires = models.DateTimeField('Действует до')
+    attempts = models.PositiveSmallIntegerField('Попыток ввода', default=0)
+
+    class Meta:
+        verbose_name = 'Код подтверждения'
+        verbose_name_plural = 'Коды подтверждения'
@@ -1,9 +1,63 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from mailer.services import queue_mail
+from .models import ConfirmationCode
+
+User = get_user_model()
+
+
+def hash_confirmation_code(user_id, confirmation_code):
+    return salted_hmac(
+        'users.confirmation_code', f'{user_id}:{confirmation_code}'
+    ).hexdigest()
+
+
+def issue_confirmation_code(user):
+    """Создает новый код подтверждения взамен прежнего и возвращает его."""
+    confirmation_code = User.objects.make_random_password(
+        length=settings.CONFIRMATION_CODE_LEN
+    )
+    ConfirmationCode.objects.update_or_create(user_id=user.pk, defaults={
+        'code_hash': hash_confirmation_code(user.pk, confirmation_code),
+        'expires': timezone.now() + timedelta(
+            seconds=settings.CONFIRMATION_CODE_TTL
+        ),
+        'attempts': 0,
+    })
+    return confirmation_code
+
+
+def redeem_confirmation_code(user, confirmation_code):
+    """Проверяет код и гасит его. Попытка засчитывается до сравнения,
+    поэтому параллельные запросы не обходят CONFIRMATION_CODE_MAX_ATTEMPTS.
+    """
+    codes = ConfirmationCode.objects.filter(user_id=user.pk)
+    counted = codes.filter(
+        expires__gt=timezone.now(),
+        attempts__lt=settings.CONFIRMATION_CODE_MAX_ATTEMPTS,
+    ).update(attempts=F('attempts') + 1)
+    if not counted:
+        return False
+    deleted, _ = codes.filter(
+        code_hash=hash_confirmation_code(user.pk, confirmation_code)
+    ).delete()
+    return bool(deleted)
+
+
 def send_confirmation_mail(user, confirmation_code):
+    """Ставит письмо с кодом в исходящую очередь."""
     subject = 'Успешная регистрация на сайте YaMDb.'
     message = ('Вы успешно зарегистрированы на сайте YaMDb. '
                'Ваш код подтверждения {confirmation_code}. '
                'Никому не сообщайте этот код!')
-    user.email_user(
-        subject=subject,
-        message=message.format(confirmation_code=confirmation_code),
+    queue_mail(
+        subject,
+        message.format(confirmation_code=confirmation_code),
+        [user.email],
     )
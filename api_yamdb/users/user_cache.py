@@ -0,0 +1,107 @@
+"""Кэш данных пользователя для аутентификации.
+
+Первый уровень - LRU в памяти процесса со сроком жизни записей
+USER_CACHE_TTL, второй (если задан USER_CACHE_ALIAS) - общий кэш
+Django. Обработчики сигналов User сбрасывают запись при сохранении
+и удалении пользователя; в других процессах устаревшая запись
+первого уровня живет не дольше USER_CACHE_TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+User = get_user_model()
+
+AUTH_FIELDS = ('id', 'username', 'role', 'is_superuser', 'is_active')
+
+
+def user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+class UserCache:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = self.shared_hits = self.misses = 0
+
+    def get(self, user_id):
+        """Данные пользователя (словарь полей AUTH_FIELDS)
+        или None, если пользователя нет."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+        data = self._get_shared(user_id)
+        if data is None:
+            data = User.objects.filter(pk=user_id).values(
+                *AUTH_FIELDS
+            ).first()
+            with self._lock:
+                self.misses += 1
+            if data is None:
+                return None
+            self._set_shared(user_id, data)
+        else:
+            with self._lock:
+                self.shared_hits += 1
+        self._store(user_id, data, now)
+        return data
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+        shared = self._shared_cache()
+        if shared is not None:
+            shared.delete(user_key(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+    def _store(self, user_id, data, now):
+        if settings.USER_CACHE_MAXSIZE <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (now + settings.USER_CACHE_TTL, data)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > settings.USER_CACHE_MAXSIZE:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _shared_cache():
+        if settings.USER_CACHE_ALIAS is None:
+            return None
+        return caches[settings.USER_CACHE_ALIAS]
+
+    def _get_shared(self, user_id):
+        shared = self._shared_cache()
+        if shared is None:
+            return None
+        return shared.get(user_key(user_id))
+
+    def _set_shared(self, user_id, data):
+        shared = self._shared_cache()
+        if shared is not None:
+            shared.set(user_key(user_id), data, settings.USER_CACHE_TTL)
+
+
+user_cache = UserCache()
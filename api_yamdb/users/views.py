@@ -1,15 +1,20 @@
-from django.conf import settings
-from django.contrib.auth import authenticate, get_user_model
+from collections.abc import Mapping
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import filters, views, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
-from users.services import send_confirmation_mail
+from api.throttling import (SignupIdentityThrottle, SignupThrottle,
+                            TokenObtainIdentityThrottle, TokenObtainThrottle)
 from . import serializers
+from .authentication import get_db_user, issue_access_token
 from .permissions import IsAdmin
+from .services import (issue_confirmation_code, redeem_confirmation_code,
+                       send_confirmation_mail)
 
 User = get_user_model()
 
@@ -30,14 +35,14 @@ class UserViewSet(viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         user = self.get_object()
-        if user == request.user:
+        if user.pk == request.user.pk:
             return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
         user.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(['get', 'patch', 'delete'], detail=False)
     def me(self, request, *args, **kwargs):
-        user = self.request.user
+        user = get_db_user(self.request.user)
         if request.method == 'GET':
             serializer = serializers.MeUserSerializer(instance=user)
             return Response(serializer.data, status=status.HTTP_200_OK)
@@ -53,27 +58,48 @@ class UserViewSet(viewsets.ModelViewSet):
 
 class SignupView(views.APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [SignupThrottle, SignupIdentityThrottle]
 
     def post(self, request):
-        serializer = serializers.SignupSerializer(data=request.data)
-        if serializer.is_valid():
-            username = serializer.data['username']
-            email = serializer.data['email']
-            confirmation_code = User.objects.make_random_password(
-                length=settings.CONFIRMATION_CODE_LEN
-            )
-            user = User.objects.create_user(
-                username=username,
-                email=email,
-                password=confirmation_code
-            )
-            send_confirmation_mail(user, confirmation_code)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user = self.get_registered_user(request.data)
+        if user is None:
+            serializer = serializers.SignupSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors,
+                                status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            if user is None:
+                # Пароль не задается: код хранится отдельно
+                # и проверяется без дорогого хеширования пароля.
+                user = User.objects.create_user(
+                    username=serializer.validated_data['username'],
+                    email=serializer.validated_data['email'],
+                )
+            # Письмо уйдет из исходящей очереди после фиксации.
+            send_confirmation_mail(user, issue_confirmation_code(user))
+        return Response(
+            {'username': user.username, 'email': user.email},
+            status=status.HTTP_200_OK
+        )
+
+    @staticmethod
+    def get_registered_user(data):
+        """Пользователь с той же парой имени и email. Повторная
+        регистрация выдает ему новый код взамен использованного,
+        просроченного или заблокированного после неверных попыток.
+        Тело не в виде объекта полей отклонит SignupSerializer."""
+        if not isinstance(data, Mapping):
+            return None
+        username = data.get('username')
+        email = data.get('email')
+        if not isinstance(username, str) or not isinstance(email, str):
+            return None
+        return User.objects.filter(username=username, email=email).first()
 
 
 class TokenObtainView(views.APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [TokenObtainThrottle, TokenObtainIdentityThrottle]
 
     def post(self, request):
         serializer = serializers.TokenObtainSerializer(data=request.data)
@@ -82,14 +108,14 @@ class TokenObtainView(views.APIView):
                             status=status.HTTP_400_BAD_REQUEST)
         username = serializer.data['username']
         confirmation_code = serializer.data['confirmation_code']
-        get_object_or_404(User, username=username)
-        user = authenticate(username=username, password=confirmation_code)
-        if user is None:
+        user = get_object_or_404(User, username=username)
+        if (not user.is_active
+                or not redeem_confirmation_code(user, confirmation_code)):
             return Response(
                 {"detail": "Ошибка аутентификации"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        token = AccessToken.for_user(user)
+        token = issue_access_token(user)
         return Response(
             {'token': str(token)},
             status=status.HTTP_200_OK
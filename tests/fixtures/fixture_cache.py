@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # База очищается между тестами, а кэш в памяти процесса - нет.
+    from django.core.cache import caches
+    from api.throttling import bucket_store
+    from users.user_cache import user_cache
+    for cache in caches.all():
+        cache.clear()
+    user_cache.clear()
+    bucket_store.clear()
+    yield
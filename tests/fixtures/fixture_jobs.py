@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def eager_jobs(settings):
+    # Тесты проверяют побочные эффекты записи сразу после запроса.
+    settings.JOBS_EAGER = True
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def eager_mailer(settings):
+    # Тесты проверяют письма в mail.outbox сразу после запроса.
+    settings.MAILER_EAGER = True
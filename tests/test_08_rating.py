@@ -0,0 +1,65 @@
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+class Test08TitleRating:
+
+    def get_title(self, title_id):
+        from reviews.models import Title
+        return Title.objects.get(id=title_id)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_counters_follow_reviews(self, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (12, 3), (
+            'Проверьте, что при создании отзыва обновляются '
+            '`score_sum` и `review_count` произведения'
+        )
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            data={'score': 10}
+        )
+        assert response.status_code == 200
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (17, 3), (
+            'Проверьте, что при изменении оценки сумма оценок '
+            'сдвигается на разницу'
+        )
+
+        response = auth_client(user).delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/'
+        )
+        assert response.status_code == 204
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (14, 2), (
+            'Проверьте, что при удалении отзыва счетчики уменьшаются'
+        )
+
+        moderator.delete()
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (10, 1), (
+            'Проверьте, что при каскадном удалении отзывов '
+            'счетчики уменьшаются'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['rating'] == 10
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_counters_command(self, admin_client, admin):
+        from reviews.models import Title
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(score_sum=0, review_count=0)
+
+        call_command('rebuild_counters')
+
+        title = self.get_title(titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (12, 3), (
+            'Проверьте, что команда `rebuild_counters` '
+            'пересчитывает счетчики произведений'
+        )
+        title = self.get_title(titles[1]['id'])
+        assert (title.score_sum, title.review_count) == (0, 0)
@@ -0,0 +1,77 @@
+import pytest
+
+
+class Test09TitleCursorPagination:
+
+    def create_titles(self):
+        from reviews.models import Category, Title
+        films = Category.objects.create(name='Фильм', slug='films')
+        books = Category.objects.create(name='Книги', slug='books')
+        titles = []
+        for number in range(25):
+            # Повторяющиеся названия проверяют разрешение ничьих по id.
+            titles.append(Title.objects.create(
+                name=f'Произведение {number // 2:02d}',
+                year=2000,
+                category=films if number % 2 else books,
+            ))
+        return sorted(titles, key=lambda title: (title.name, title.id))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_walk_forward_and_back(self, client):
+        titles = self.create_titles()
+        response = client.get('/api/v1/titles/?pagination=cursor')
+        assert response.status_code == 200
+        data = response.json()
+        assert 'count' not in data and data['previous'] is None, (
+            'Проверьте, что первая страница курсорной пагинации '
+            'не считает `count` и не имеет ссылки `previous`'
+        )
+        pages = [data]
+        while data['next']:
+            data = client.get(data['next']).json()
+            pages.append(data)
+        ids = [item['id'] for page in pages for item in page['results']]
+        assert ids == [title.id for title in titles], (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'обходит все произведения по порядку (name, id) без повторов'
+        )
+
+        back = client.get(pages[-1]['previous']).json()
+        assert back['results'] == pages[-2]['results'], (
+            'Проверьте, что ссылка `previous` возвращает предыдущую страницу'
+        )
+        assert back['next']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cursor_with_filters(self, client):
+        titles = self.create_titles()
+        expected = [
+            title.id for title in titles if title.category.slug == 'films'
+        ]
+        url = '/api/v1/titles/?pagination=cursor&category=films'
+        ids = []
+        while url:
+            data = client.get(url).json()
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        assert ids == expected, (
+            'Проверьте, что курсорная пагинация работает вместе с фильтрами'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_invalid_cursor(self, client):
+        import base64
+        import json
+        self.create_titles()
+        response = client.get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == 404
+        for position in ([[1], {'a': 1}], [None, 1], ['Имя', 'abc']):
+            cursor = base64.urlsafe_b64encode(
+                json.dumps({'p': position, 'r': 0}).encode()
+            ).decode()
+            response = client.get(f'/api/v1/titles/?cursor={cursor}')
+            assert response.status_code == 404, (
+                f'Проверьте, что курсор с позицией {position} '
+                'возвращает статус 404'
+            )
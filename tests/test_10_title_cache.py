@@ -0,0 +1,69 @@
+import pytest
+
+from .common import auth_client, create_titles, create_users_api
+
+
+@pytest.fixture(params=['locmem', 'file'])
+def title_cache(request, settings, tmp_path):
+    if request.param == 'file':
+        settings.CACHES = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': str(tmp_path),
+            }
+        }
+    return request.param
+
+
+class Test10TitleCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_repeated_reads_hit_cache(self, client, admin_client,
+                                         title_cache,
+                                         django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        for path in ('/api/v1/titles/?genre=drama', url):
+            first = client.get(path)
+            with django_assert_num_queries(0):
+                second = client.get(path)
+            assert first.json() == second.json(), (
+                f'Проверьте, что повторный GET запрос `{path}` '
+                'отдается из кэша без запросов к базе'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_writes_invalidate_cache(self, client, admin_client,
+                                        title_cache):
+        from reviews.models import Genre
+        titles, _, genres = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] is None
+
+        user, _ = create_users_api(admin_client)
+        auth_client(user).post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            data={'text': 'Хорошо', 'score': 8}
+        )
+        assert client.get(url).json()['rating'] == 8, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения'
+        )
+
+        genre = Genre.objects.get(slug=genres[0]['slug'])
+        genre.name = 'Триллер'
+        genre.save()
+        names = {item['name'] for item in client.get(url).json()['genre']}
+        assert 'Триллер' in names, (
+            'Проверьте, что изменение жанра сбрасывает кэш произведения'
+        )
+
+        admin_client.patch(url, data={'name': 'Поворот обратно'})
+        data = client.get('/api/v1/titles/?name=обратно').json()
+        assert [item['id'] for item in data['results']] == [titles[0]['id']], (
+            'Проверьте, что изменение произведения сбрасывает кэш списка'
+        )
+
+        genre.titles.clear()
+        assert client.get(url).json()['genre'] == [genres[1]], (
+            'Проверьте, что изменение связей жанров сбрасывает кэш'
+        )
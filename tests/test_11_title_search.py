@@ -0,0 +1,45 @@
+import pytest
+
+
+class Test11TitleSearch:
+
+    def search(self, client, text):
+        response = client.get('/api/v1/titles/', {'search': text})
+        assert response.status_code == 200
+        return [item['name'] for item in response.json()['results']]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search_is_case_insensitive_for_cyrillic(self, client):
+        from reviews.models import Title
+        Title.objects.create(name='Война и мир', year=1869,
+                             description='Роман-эпопея')
+        Title.objects.create(name='Мир', year=2000,
+                             description='Война миров и мир войны')
+        Title.objects.create(name='Идиот', year=1869)
+
+        assert self.search(client, 'ВОЙНА') == ['Война и мир', 'Мир'], (
+            'Проверьте, что параметр `search` находит кириллицу '
+            'без учета регистра по названию и описанию'
+        )
+        assert self.search(client, 'мир') == ['Мир', 'Война и мир'], (
+            'Проверьте, что результаты `search` упорядочены по релевантности'
+        )
+        assert self.search(client, 'иди') == ['Идиот'], (
+            'Проверьте, что `search` ищет слова по префиксу'
+        )
+        assert self.search(client, 'война идиот') == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_index_follows_writes(self, client):
+        from reviews.models import Title
+        title = Title.objects.create(name='Черновик', year=2020)
+        title.name = 'Чистовик'
+        title.save()
+        assert self.search(client, 'черновик') == []
+        assert self.search(client, 'чистовик') == ['Чистовик'], (
+            'Проверьте, что индекс поиска обновляется при изменении произведения'
+        )
+        title.delete()
+        assert self.search(client, 'чистовик') == [], (
+            'Проверьте, что индекс поиска обновляется при удалении произведения'
+        )
@@ -0,0 +1,54 @@
+import pytest
+
+from .common import create_titles
+
+
+class Test12GenreFilter:
+
+    def ids(self, client, query):
+        response = client.get(f'/api/v1/titles/?{query}')
+        assert response.status_code == 200
+        return sorted(item['id'] for item in response.json()['results'])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_any_and_all(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        assert self.ids(client, 'genre=horror') == [first]
+        assert self.ids(client, 'genre=horror,drama') == [first, second], (
+            'Проверьте, что несколько жанров по умолчанию объединяются (any)'
+        )
+        assert self.ids(client, 'genre=horror&genre=drama') == [first, second]
+        assert self.ids(
+            client, 'genre=horror,comedy&genre_mode=all'
+        ) == [first], (
+            'Проверьте, что `genre_mode=all` оставляет произведения '
+            'со всеми указанными жанрами'
+        )
+        assert self.ids(client, 'genre=horror,drama&genre_mode=all') == []
+        assert self.ids(client, 'genre=unknown') == []
+        response = client.get('/api/v1/titles/?genre=drama&genre_mode=none')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_index_follows_writes(self, client, admin_client):
+        from reviews.models import Genre, Title
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        assert self.ids(client, 'genre=drama') == [second]
+
+        admin_client.patch(
+            f'/api/v1/titles/{first}/', data={'genre': ['drama']}
+        )
+        assert self.ids(client, 'genre=drama') == [first, second], (
+            'Проверьте, что индекс жанров обновляется при изменении связей'
+        )
+
+        Genre.objects.filter(slug='drama').update(slug='tragedy')
+        Genre.objects.get(slug='tragedy').save()
+        assert self.ids(client, 'genre=tragedy') == [first, second], (
+            'Проверьте, что индекс жанров обновляется при изменении жанра'
+        )
+
+        Title.objects.get(id=first).delete()
+        assert self.ids(client, 'genre=tragedy') == [second]
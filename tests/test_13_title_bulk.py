@@ -0,0 +1,143 @@
+import pytest
+
+from .common import create_categories, create_genre, create_titles
+
+
+class Test13TitleBulk:
+    url = '/api/v1/titles/bulk/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_create_and_update(self, admin_client,
+                                       django_assert_max_num_queries):
+        from reviews.models import Title
+        titles, _, _ = create_titles(admin_client)
+        data = [
+            {'name': f'Сборник {number}', 'year': 1950 + number,
+             'genre': ['drama', 'comedy'], 'category': 'books'}
+            for number in range(50)
+        ]
+        data.append({
+            'id': titles[0]['id'], 'name': 'Поворот обратно', 'year': 2001,
+            'genre': ['drama'], 'category': 'books', 'description': '',
+        })
+        with django_assert_max_num_queries(20):
+            response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == 201, (
+            f'Проверьте, что POST запрос `{self.url}` с правильными данными '
+            'возвращает статус 201'
+        )
+        result = response.json()
+        assert [item['name'] for item in result] == [
+            item['name'] for item in data
+        ], 'Проверьте, что ответ содержит произведения в порядке запроса'
+        assert Title.objects.count() == 52
+        created = Title.objects.get(id=result[10]['id'])
+        assert created.name == 'Сборник 10'
+        assert set(created.genre.values_list('slug', flat=True)) == {
+            'drama', 'comedy'
+        }
+        updated = Title.objects.get(id=titles[0]['id'])
+        assert updated.name == 'Поворот обратно'
+        assert list(updated.genre.values_list('slug', flat=True)) == [
+            'drama'
+        ]
+        listed = admin_client.get('/api/v1/titles/?genre=drama').json()
+        assert listed['count'] == 52, (
+            'Проверьте, что массовая загрузка сбрасывает кэш и индекс жанров'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_errors_are_per_item(self, admin_client, user_client):
+        from reviews.models import Title
+        create_genre(admin_client)
+        create_categories(admin_client)
+        data = [
+            {'name': 'Годно', 'year': 2000, 'genre': ['drama'],
+             'category': 'books'},
+            {'name': 'Без жанра', 'year': 2000, 'genre': ['unknown'],
+             'category': 'books'},
+            {'name': 'Из будущего', 'year': 3000, 'genre': [],
+             'category': 'films'},
+            {'id': 999, 'name': 'Чужое', 'year': 2000, 'genre': [],
+             'category': 'nothing'},
+        ]
+        response = user_client.post(self.url, data=data, format='json')
+        assert response.status_code == 403
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert set(errors[1]) == {'genre'}
+        assert set(errors[2]) == {'year'}
+        assert set(errors[3]) == {'id', 'category'}
+        assert Title.objects.count() == 0, (
+            'Проверьте, что при ошибке не сохраняется ни одно произведение'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_repeated_id_rejected(self, admin_client):
+        from reviews.models import Title
+        titles, _, _ = create_titles(admin_client)
+        item = {
+            'id': titles[0]['id'], 'year': 2001,
+            'genre': ['drama'], 'category': 'books',
+        }
+        data = [dict(item, name='Первый'), dict(item, name='Второй')]
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что повтор id в одном запросе возвращает статус 400'
+        )
+        errors = response.json()
+        assert errors[0] == {} and 'id' in errors[1], (
+            'Проверьте, что ошибка повтора id указана у повторного элемента'
+        )
+        assert Title.objects.get(id=titles[0]['id']).name == titles[0]['name']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_ids_without_bulk_returning(self, admin_client, monkeypatch):
+        from django.db import connection
+        from reviews.models import Title
+        create_titles(admin_client)
+        # Бэкенд, который не возвращает id из INSERT и допускает
+        # одновременные вставки: строки вставляются по одной.
+        monkeypatch.setattr(connection, 'vendor', 'other')
+        genres = ['drama', 'comedy', 'horror']
+        data = [
+            {'name': f'Том {number}', 'year': 2000,
+             'genre': [genres[number % 3]], 'category': 'books'}
+            for number in range(6)
+        ]
+        response = admin_client.post(self.url, data=data, format='json')
+        assert response.status_code == 201
+        for item, created in zip(data, response.json()):
+            title = Title.objects.get(id=created['id'])
+            assert title.name == item['name']
+            assert list(title.genre.values_list('slug', flat=True)) == (
+                item['genre']
+            ), 'Проверьте, что жанры связаны со своими произведениями'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_validation_inside_write_transaction(self, admin_client,
+                                                    monkeypatch):
+        from django.db import connection
+        from api.serializers import TitleBulkListSerializer
+        create_titles(admin_client)
+        resolve = TitleBulkListSerializer.resolve_relations
+        atomic = []
+
+        def resolve_relations(items, errors):
+            atomic.append(connection.in_atomic_block)
+            resolve(items, errors)
+
+        monkeypatch.setattr(
+            TitleBulkListSerializer, 'resolve_relations',
+            staticmethod(resolve_relations)
+        )
+        response = admin_client.post(self.url, data=[{
+            'name': 'Один', 'year': 2000,
+            'genre': ['drama'], 'category': 'books',
+        }], format='json')
+        assert response.status_code == 201
+        assert atomic == [True], (
+            'Проверьте, что ссылки проверяются в транзакции записи'
+        )
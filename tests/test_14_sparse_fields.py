@@ -0,0 +1,60 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test14SparseFields:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_fields(self, client, admin_client, admin,
+                             django_assert_num_queries):
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        with django_assert_num_queries(2):
+            response = client.get('/api/v1/titles/?fields=id,name,rating')
+        assert response.status_code == 200
+        results = response.json()['results']
+        assert all(
+            set(item) == {'id', 'name', 'rating'} for item in results
+        ), (
+            'Проверьте, что параметр `fields` оставляет в ответе '
+            'только перечисленные поля'
+        )
+        assert {item['rating'] for item in results} == {4, None}
+
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/?fields=genre,unknown'
+        )
+        assert list(response.json()) == ['genre']
+        assert len(response.json()['genre']) == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_review_and_comment_fields(self, client, admin_client, admin,
+                                          django_assert_num_queries):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(url + '?fields=author,score')
+        assert {
+            (item['author'], item['score'])
+            for item in response.json()['results']
+        } == {(review['author'], review['score']) for review in reviews}
+        assert all(
+            set(item) == {'author', 'score'}
+            for item in response.json()['results']
+        )
+
+        url += f'{reviews[0]["id"]}/comments/?fields=id,text'
+        response = client.get(url)
+        assert all(
+            set(item) == {'id', 'text'}
+            for item in response.json()['results']
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_fields_ignored_on_write(self, admin_client, admin):
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/?fields=id',
+            data={'year': 2001}
+        )
+        assert response.status_code == 200
+        assert response.json()['year'] == 2001
@@ -0,0 +1,109 @@
+import pytest
+from django.core.cache import cache
+
+from .common import create_comments
+
+
+class Test15FastSerializers:
+
+    def render_both(self, client, monkeypatch, viewset, url):
+        """Возвращает ответы быстрого и обычного сериализатора."""
+        cache.clear()
+        fast = client.get(url)
+        monkeypatch.setattr(viewset, 'fast_serializer_class', None)
+        cache.clear()
+        slow = client.get(url)
+        monkeypatch.undo()
+        return fast, slow
+
+    def assert_same(self, client, monkeypatch, viewset, url):
+        fast, slow = self.render_both(client, monkeypatch, viewset, url)
+        assert fast.status_code == slow.status_code
+        assert fast.content == slow.content, (
+            f'Проверьте, что быстрый сериализатор для `{url}` '
+            'отдает тот же JSON, что и обычный'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles(self, client, admin_client, admin, monkeypatch):
+        from api.views import TitleViewSet
+        from reviews.models import Title
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        Title.objects.create(name='Без категории', year=1999)
+        urls = [
+            '/api/v1/titles/',
+            '/api/v1/titles/?fields=id,rating,genre',
+            '/api/v1/titles/?pagination=cursor&genre=drama,horror',
+            '/api/v1/titles/?search=драма',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            f'/api/v1/titles/{titles[1]["id"]}/?fields=category',
+            '/api/v1/titles/100500/',
+        ]
+        for url in urls:
+            self.assert_same(client, monkeypatch, TitleViewSet, url)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_and_comments(self, client, admin_client, admin,
+                                     monkeypatch):
+        from api.views import CommentViewSet, ReviewViewSet
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for url in (
+            reviews_url,
+            reviews_url + '?fields=author,pub_date',
+            f'{reviews_url}{reviews[0]["id"]}/',
+        ):
+            self.assert_same(client, monkeypatch, ReviewViewSet, url)
+
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        response = client.get(comments_url)
+        for url in (
+            comments_url,
+            comments_url + '?fields=text',
+            f'{comments_url}{response.json()["results"][0]["id"]}/',
+        ):
+            self.assert_same(client, monkeypatch, CommentViewSet, url)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_fast_list_queries(self, client, admin_client, admin,
+                                  django_assert_num_queries):
+        create_comments(admin_client, admin)
+        # Счетчик страниц, строки страницы и жанры страницы.
+        with django_assert_num_queries(3):
+            client.get('/api/v1/titles/')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_invalid_lookup(self, client, admin_client, admin,
+                               monkeypatch):
+        from api.views import ReviewViewSet, TitleViewSet
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        for viewset, url in (
+            (TitleViewSet, '/api/v1/titles/abc/'),
+            (ReviewViewSet, f'/api/v1/titles/{titles[0]["id"]}/reviews/abc/'),
+        ):
+            fast, slow = self.render_both(client, monkeypatch, viewset, url)
+            assert (fast.status_code, slow.status_code) == (404, 404), (
+                f'Проверьте, что `{url}` с нечисловым ключом '
+                'возвращает статус 404'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_fast_path_selects_columns(self, client, admin_client, admin):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?fields=score'
+        with CaptureQueriesContext(connection) as context:
+            assert client.get(url).status_code == 200
+        rows = next(
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_review"' in query['sql']
+        )
+        assert '"reviews_review"."text"' not in rows, (
+            'Проверьте, что быстрый путь загружает только колонки '
+            'запрошенных полей'
+        )
+        assert 'users_user' not in rows, (
+            'Проверьте, что быстрый путь не присоединяет автора, '
+            'если поле author не запрошено'
+        )
@@ -0,0 +1,118 @@
+import pytest
+
+from .common import auth_client, create_comments
+
+
+class Test16ConditionalGet:
+
+    def assert_not_modified(self, client, url, django_assert_num_queries):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.has_header('ETag') and response.has_header(
+            'Last-Modified'
+        ), f'Проверьте, что GET запрос `{url}` отдает ETag и Last-Modified'
+        with django_assert_num_queries(0):
+            cached = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert cached.status_code == 304, (
+            f'Проверьте, что GET запрос `{url}` с совпадающим If-None-Match '
+            'возвращает статус 304 без запросов к базе'
+        )
+        assert cached['ETag'] == response['ETag']
+        cached = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert cached.status_code == 304
+        return response['ETag']
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_not_modified(self, client, admin_client, admin,
+                             django_assert_num_queries):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        for url in (
+            '/api/v1/titles/', title_url,
+            f'{title_url}reviews/', review_url,
+            f'{review_url}comments/', f'{review_url}comments/{comments[0]["id"]}/',
+            '/api/v1/genres/', '/api/v1/categories/',
+        ):
+            self.assert_not_modified(client, url, django_assert_num_queries)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_writes_change_etag(self, client, admin_client, admin,
+                                   django_assert_num_queries):
+        comments, reviews, titles, user, _ = create_comments(
+            admin_client, admin
+        )
+        review_url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        )
+        urls = {
+            'reviews': f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            'comments': f'{review_url}comments/',
+            'genres': '/api/v1/genres/',
+        }
+        etags = {
+            name: self.assert_not_modified(
+                client, url, django_assert_num_queries
+            )
+            for name, url in urls.items()
+        }
+
+        auth_client(user).patch(
+            f'{urls["reviews"]}{reviews[1]["id"]}/',
+            data={'text': 'Новый текст'}
+        )
+        auth_client(user).post(f'{review_url}comments/', data={'text': 'Еще'})
+        admin_client.post('/api/v1/genres/', data={
+            'name': 'Мистика', 'slug': 'mystic'
+        })
+        for name, url in urls.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[name])
+            assert response.status_code == 200, (
+                f'Проверьте, что после изменения данных GET запрос `{url}` '
+                'с прежним ETag возвращает статус 200'
+            )
+            assert response['ETag'] != etags[name]
+
+    def test_03_version_names_required(self):
+        from django.core.exceptions import ImproperlyConfigured
+        from rest_framework import viewsets
+
+        from api.mixins import ConditionalListMixin
+
+        with pytest.raises(ImproperlyConfigured):
+            type('NoVersionsViewSet', (
+                ConditionalListMixin, viewsets.GenericViewSet
+            ), {})
+        viewset = type('StaticVersionsViewSet', (
+            ConditionalListMixin, viewsets.GenericViewSet
+        ), {'version_names': ('static',)})
+        assert viewset().get_version_names() == ('static',), (
+            'Проверьте, что get_version_names по умолчанию возвращает '
+            'version_names'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_author_rename_changes_etag(self, client, admin_client, admin):
+        comments, reviews, titles, user, _ = create_comments(
+            admin_client, admin
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        urls = (
+            reviews_url, f'{reviews_url}{reviews[1]["id"]}/',
+            comments_url, f'{comments_url}{comments[1]["id"]}/',
+        )
+        etags = {url: client.get(url)['ETag'] for url in urls}
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        assert response.status_code == 200
+        for url in urls:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            assert response.status_code == 200, (
+                f'Проверьте, что после смены имени автора GET запрос '
+                f'`{url}` с прежним ETag возвращает статус 200'
+            )
+            assert 'renamed' in response.content.decode()
@@ -0,0 +1,59 @@
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+class Test17TopTitles:
+    url = '/api/v1/titles/top/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_top_is_weighted(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        # Единственная десятка притягивается к априорной средней 5.5.
+        auth_client(user).post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data={'text': 'Шедевр', 'score': 10}
+        )
+        response = client.get(self.url)
+        assert response.status_code == 200, (
+            f'Проверьте, что GET запрос `{self.url}` возвращает статус 200'
+        )
+        data = response.json()
+        assert [item['id'] for item in data] == [
+            titles[1]['id'], titles[0]['id']
+        ]
+        assert data[0]['weighted_rating'] == pytest.approx(
+            (10 + 5.5 * 5) / 6
+        )
+        assert data[1]['rating'] == 4
+
+        response = client.get(self.url, {'category': 'films'})
+        assert [item['id'] for item in response.json()] == [titles[0]['id']]
+        response = client.get(self.url, {'genre': 'drama', 'limit': 1})
+        assert [item['id'] for item in response.json()] == [titles[1]['id']]
+        response = client.get(self.url, {'year': 1900})
+        assert response.json() == []
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ranking_follows_reviews(self, client, admin_client, admin):
+        from reviews.models import TitleRanking
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        for review in reviews:
+            admin_client.delete(
+                f'/api/v1/titles/{titles[0]["id"]}/reviews/{review["id"]}/'
+            )
+        assert client.get(self.url).json() == [], (
+            'Проверьте, что произведение без отзывов выпадает из топа'
+        )
+        assert not TitleRanking.objects.exists()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rebuild_rankings_command(self, client, admin_client, admin):
+        from reviews.models import TitleRanking
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        TitleRanking.objects.all().delete()
+        call_command('rebuild_rankings')
+        assert [item['id'] for item in client.get(self.url).json()] == [
+            titles[0]['id']
+        ]
@@ -0,0 +1,94 @@
+import pytest
+
+
+class Test18FeedCursorPagination:
+
+    def walk(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        return ids
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_and_comments(self, client, django_user_model):
+        from reviews.models import Comment, Review, Title
+        title = Title.objects.create(name='Долгожитель', year=1990)
+        other = Title.objects.create(name='Другое', year=1990)
+        users = [
+            django_user_model.objects.create_user(
+                username=f'reader{number}', email=f'reader{number}@yamdb.fake'
+            )
+            for number in range(23)
+        ]
+        reviews = [
+            Review.objects.create(title=title, author=user, text='Ок', score=7)
+            for user in users
+        ]
+        Review.objects.create(title=other, author=users[0], text='-', score=1)
+        # Одинаковое время публикации проверяет разрешение ничьих по id.
+        Review.objects.filter(id__in=[r.id for r in reviews[:5]]).update(
+            pub_date=reviews[0].pub_date
+        )
+        expected = list(
+            Review.objects.filter(title=title)
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        assert self.walk(client, url) == expected, (
+            'Проверьте, что курсорная пагинация отзывов обходит все отзывы '
+            'произведения от новых к старым без повторов'
+        )
+
+        review = reviews[-1]
+        for user in users:
+            Comment.objects.create(review=review, author=user, text='+1')
+        expected = list(
+            review.comments.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        url = (
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            '?pagination=cursor&fields=id,text'
+        )
+        assert self.walk(client, url) == expected, (
+            'Проверьте, что курсорная пагинация комментариев обходит '
+            'все комментарии отзыва'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_tampered_cursor(self, client, django_user_model):
+        import base64
+        import json
+        from reviews.models import Comment, Review, Title
+        title = Title.objects.create(name='Подделка', year=1990)
+        user = django_user_model.objects.create_user(
+            username='forger', email='forger@yamdb.fake'
+        )
+        review = Review.objects.create(
+            title=title, author=user, text='Ок', score=7
+        )
+        Comment.objects.create(review=review, author=user, text='+1')
+        urls = (
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+            f'/api/v1/users/{user.username}/reviews/',
+        )
+        positions = (
+            ['zzz', 1], [review.pub_date.isoformat(), 'zzz'],
+            [[1], {'a': 1}], [True, 1],
+        )
+        for url in urls:
+            for position in positions:
+                cursor = base64.urlsafe_b64encode(
+                    json.dumps({'p': position, 'r': 0}).encode()
+                ).decode()
+                response = client.get(f'{url}?cursor={cursor}')
+                assert response.status_code == 404, (
+                    f'Проверьте, что GET запрос `{url}` с курсором '
+                    f'{position} возвращает статус 404'
+                )
@@ -0,0 +1,38 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test19NestedRoutes:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_review_must_belong_to_title(self, client, admin_client,
+                                            admin):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = (
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        response = client.get(url)
+        assert response.status_code == 404, (
+            'Проверьте, что GET запрос списка комментариев к отзыву '
+            'другого произведения возвращает статус 404'
+        )
+        response = admin_client.post(url, data={'text': 'Мимо'})
+        assert response.status_code == 404, (
+            'Проверьте, что POST запрос комментария к отзыву '
+            'другого произведения возвращает статус 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_chain_resolved_once(self, client, admin_client, admin,
+                                    django_assert_num_queries):
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/'
+        )
+        # Цепочка произведение-отзыв, счетчик страниц и строки страницы.
+        with django_assert_num_queries(3):
+            response = client.get(url)
+        assert response.json()['count'] == 3
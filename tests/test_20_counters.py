@@ -0,0 +1,81 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_comments
+
+
+class Test20Counters:
+
+    def get_review(self, review_id):
+        from reviews.models import Review
+        return Review.objects.get(id=review_id)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_comment_count_follows_comments(self, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            admin_client, admin
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        assert self.get_review(reviews[0]['id']).comment_count == 3, (
+            'Проверьте, что при создании комментария обновляется '
+            '`comment_count` отзыва'
+        )
+        response = admin_client.get(url)
+        assert response.json()['comment_count'] == 3, (
+            'Проверьте, что отзыв отдает поле `comment_count`'
+        )
+
+        response = auth_client(user).delete(
+            f'{url}comments/{comments[1]["id"]}/'
+        )
+        assert response.status_code == 204
+        assert self.get_review(reviews[0]['id']).comment_count == 2, (
+            'Проверьте, что при удалении комментария счетчик уменьшается'
+        )
+        response = admin_client.get(url)
+        assert response.json()['comment_count'] == 2, (
+            'Проверьте, что комментарии сбрасывают кэш ответа отзыва'
+        )
+
+        moderator.delete()
+        assert self.get_review(reviews[0]['id']).comment_count == 1, (
+            'Проверьте, что при каскадном удалении комментариев '
+            'счетчик уменьшается'
+        )
+
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()['review_count'] == 2, (
+            'Проверьте, что произведение отдает поле `review_count`'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rebuild_counters_reconciles_drift(self, admin_client, admin):
+        from reviews.models import Review, Title
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        Review.objects.filter(id=reviews[0]['id']).update(comment_count=7)
+        Title.objects.filter(id=titles[0]['id']).update(review_count=0)
+
+        out = StringIO()
+        call_command('rebuild_counters', '--dry-run', stdout=out)
+        assert self.get_review(reviews[0]['id']).comment_count == 7, (
+            'Проверьте, что `rebuild_counters --dry-run` ничего не меняет'
+        )
+        assert 'произведений: 1' in out.getvalue()
+        assert 'отзывов: 1' in out.getvalue(), (
+            'Проверьте, что команда сообщает число разошедшихся счетчиков'
+        )
+
+        call_command('rebuild_counters', stdout=StringIO())
+        assert self.get_review(reviews[0]['id']).comment_count == 3
+        assert self.get_review(reviews[1]['id']).comment_count == 0
+        assert Title.objects.get(id=titles[0]['id']).review_count == 3, (
+            'Проверьте, что команда `rebuild_counters` '
+            'пересчитывает разошедшиеся счетчики'
+        )
+
+        out = StringIO()
+        call_command('rebuild_counters', '--dry-run', stdout=out)
+        assert 'произведений: 0' in out.getvalue()
+        assert 'отзывов: 0' in out.getvalue()
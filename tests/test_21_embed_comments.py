@@ -0,0 +1,72 @@
+import pytest
+
+from .common import auth_client, create_comments
+
+
+class Test21EmbedComments:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_latest_comments_embedded(self, client, admin_client, admin):
+        comments, reviews, titles, user, _ = create_comments(
+            admin_client, admin
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        auth_client(user).post(
+            f'{reviews_url}{reviews[1]["id"]}/comments/', data={'text': 'abc'}
+        )
+
+        response = client.get(f'{reviews_url}?embed=comments&comments_limit=2')
+        assert response.status_code == 200
+        results = {row['id']: row for row in response.json()['results']}
+        expected = client.get(
+            f'{reviews_url}{reviews[0]["id"]}/comments/'
+        ).json()['results']
+        assert results[reviews[0]['id']]['comments'] == expected[:2], (
+            'Проверьте, что с `?embed=comments&comments_limit=N` к отзыву '
+            'добавляются N последних комментариев в формате ленты '
+            'комментариев'
+        )
+        assert [
+            comment['text'] for comment in results[reviews[1]['id']]['comments']
+        ] == ['abc']
+        assert results[reviews[2]['id']]['comments'] == []
+
+        response = client.get(reviews_url)
+        assert 'comments' not in response.json()['results'][0], (
+            'Проверьте, что без `embed` комментарии не встраиваются'
+        )
+        response = client.get(f'{reviews_url}{reviews[0]["id"]}/?embed=comments')
+        assert 'comments' not in response.json()
+
+        response = client.get(f'{reviews_url}?embed=comments&comments_limit=x')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_single_windowed_query(self, client, admin_client, admin,
+                                      django_assert_num_queries):
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        # Счетчик страниц, строки страницы и комментарии всех отзывов.
+        with django_assert_num_queries(3):
+            response = client.get(f'{reviews_url}?embed=comments')
+        assert response.status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_embedded_without_fast_path(self, client, admin_client, admin,
+                                           monkeypatch,
+                                           django_assert_max_num_queries):
+        from api.views import ReviewViewSet
+        _, _, titles, _, _ = create_comments(admin_client, admin)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            '?embed=comments&comments_limit=2'
+        )
+        fast = client.get(url)
+        monkeypatch.setattr(ReviewViewSet, 'fast_serializer_class', None)
+        # Счетчик, отзывы с авторами и комментарии всех отзывов.
+        with django_assert_max_num_queries(4):
+            slow = client.get(url)
+        assert fast.content == slow.content, (
+            'Проверьте, что `?embed=comments` работает и без быстрого '
+            'сериализатора'
+        )
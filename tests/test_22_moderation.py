@@ -0,0 +1,175 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_comments
+
+URL = '/api/v1/moderation/'
+
+
+class Test22Moderation:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_permissions(self, client, admin_client, admin):
+        comments, reviews, _, user, moderator = create_comments(
+            admin_client, admin
+        )
+        data = {'action': 'delete', 'reviews': [reviews[0]['id']]}
+        response = client.post(URL, data=data, format='json')
+        assert response.status_code == 401
+        response = auth_client(user).post(URL, data=data, format='json')
+        assert response.status_code == 403, (
+            'Проверьте, что массовая модерация доступна только '
+            'модераторам и администраторам'
+        )
+        response = auth_client(moderator).post(
+            URL, data={'action': 'delete'}, format='json'
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что без отзывов, комментариев и авторов '
+            'возвращается статус 400'
+        )
+        response = auth_client(moderator).post(
+            URL, data={'action': 'burn', 'reviews': [1]}, format='json'
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_hide_and_unhide(self, client, admin_client, admin):
+        from reviews.models import Title
+        comments, reviews, titles, user, moderator = create_comments(
+            admin_client, admin
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_url = f'{title_url}reviews/{reviews[0]["id"]}/'
+        client.get(f'{title_url}reviews/')
+
+        response = auth_client(moderator).post(URL, data={
+            'action': 'hide',
+            'reviews': [reviews[1]['id']],
+            'comments': [comments[0]['id']],
+        }, format='json')
+        assert response.status_code == 200
+        assert response.json() == {
+            'action': 'hide', 'reviews': 1, 'comments': 1
+        }
+        title = Title.objects.get(id=titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (9, 2), (
+            'Проверьте, что скрытые отзывы не учитываются в рейтинге'
+        )
+        ids = [
+            row['id']
+            for row in client.get(f'{title_url}reviews/').json()['results']
+        ]
+        assert reviews[1]['id'] not in ids, (
+            'Проверьте, что скрытые отзывы не попадают в ленту'
+        )
+        assert client.get(
+            f'{title_url}reviews/{reviews[1]["id"]}/'
+        ).status_code == 404
+        assert client.get(review_url).json()['comment_count'] == 2
+        comment_ids = [
+            row['id']
+            for row in client.get(f'{review_url}comments/').json()['results']
+        ]
+        assert comments[0]['id'] not in comment_ids
+
+        auth_client(user).patch(
+            f'{review_url}comments/{comments[1]["id"]}/', data={'text': 'x'}
+        )
+        assert client.get(review_url).json()['comment_count'] == 2
+
+        response = auth_client(moderator).post(URL, data={
+            'action': 'unhide',
+            'reviews': [reviews[1]['id']],
+            'comments': [comments[0]['id']],
+        }, format='json')
+        assert response.status_code == 200
+        title = Title.objects.get(id=titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (12, 3)
+        assert client.get(review_url).json()['comment_count'] == 3
+        assert client.get(title_url).json()['rating'] == 4
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_delete_by_author(self, client, admin_client, admin,
+                                 django_assert_max_num_queries):
+        from reviews.models import Comment, Review, Title, TitleRanking
+        comments, reviews, titles, user, moderator = create_comments(
+            admin_client, admin
+        )
+        with django_assert_max_num_queries(24):
+            response = auth_client(moderator).post(URL, data={
+                'action': 'delete',
+                'authors': [user.username],
+                'reviews': [reviews[0]['id']],
+            }, format='json')
+        assert response.status_code == 200
+        assert response.json() == {
+            'action': 'delete', 'reviews': 2, 'comments': 3
+        }, (
+            'Проверьте, что вместе с отзывом удаляются его комментарии'
+        )
+        assert not Review.objects.filter(
+            id__in=[reviews[0]['id'], reviews[1]['id']]
+        ).exists()
+        assert not Comment.objects.exists()
+        title = Title.objects.get(id=titles[0]['id'])
+        assert (title.score_sum, title.review_count) == (4, 1), (
+            'Проверьте, что после удаления счетчики произведения '
+            'пересчитываются'
+        )
+        assert TitleRanking.objects.filter(title_id=title.id).exists()
+        assert client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/'
+        ).json()['rating'] == 4
+
+        out = StringIO()
+        call_command('rebuild_counters', '--dry-run', stdout=out)
+        assert 'произведений: 0' in out.getvalue()
+        assert 'отзывов: 0' in out.getvalue()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_direct_call_invalidates_cache(self, client, admin_client,
+                                              admin):
+        from reviews.moderation import DELETE, moderate
+        _, reviews, titles, _, _ = create_comments(admin_client, admin)
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(title_url).json()['review_count'] == 3
+        etag = client.get(f'{title_url}reviews/')['ETag']
+
+        moderate(DELETE, review_ids=[reviews[0]['id']])
+        assert client.get(title_url).json()['review_count'] == 2, (
+            'Проверьте, что moderate() сам сбрасывает кэш произведения'
+        )
+        assert client.get(f'{title_url}reviews/')['ETag'] != etag, (
+            'Проверьте, что moderate() меняет версию списка отзывов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_delete_many_rows(self, django_user_model):
+        from reviews.models import Comment, Review, Title
+        from reviews.moderation import DELETE, moderate
+        spammer = django_user_model.objects.create_user(
+            username='spammer', email='spammer@yamdb.fake'
+        )
+        other = django_user_model.objects.create_user(
+            username='reader', email='reader@yamdb.fake'
+        )
+        title = Title.objects.create(name='Мишень', year=2000)
+        review = Review.objects.create(
+            title=title, author=other, text='Ок', score=7
+        )
+        # Больше, чем помещается параметров в один запрос SQLite.
+        Comment.objects.bulk_create([
+            Comment(review=review, author=spammer, text='спам')
+            for _ in range(1200)
+        ])
+        Comment.objects.create(review=review, author=other, text='Ответ')
+        result = moderate(DELETE, authors=[spammer.username])
+        assert len(result.comments) == 1200
+        assert list(Comment.objects.values_list('text', flat=True)) == [
+            'Ответ'
+        ], 'Проверьте, что удаляются все и только отобранные комментарии'
+        review.refresh_from_db()
+        assert review.comment_count == 1
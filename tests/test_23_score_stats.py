@@ -0,0 +1,103 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from .common import auth_client, create_reviews
+
+
+class Test23ScoreStats:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_stats_follow_reviews(self, client, admin_client, admin):
+        reviews, titles, user, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/stats/'
+        response = client.get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/titles/{title_id}/stats/` '
+            'доступен без авторизации'
+        )
+        data = response.json()
+        assert data['review_count'] == 3
+        assert data['mean'] == 4.0
+        assert data['median'] == 4.0
+        assert data['distribution'] == {
+            str(score): int(score in (3, 4, 5)) for score in range(1, 11)
+        }, 'Проверьте распределение оценок по столбцам 1-10'
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            data={'score': 10}
+        )
+        assert response.status_code == 200
+        auth_client(user).delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/'
+        )
+        data = client.get(url).json()
+        assert (data['review_count'], data['mean'], data['median']) == (
+            2, 7.0, 7.0
+        ), (
+            'Проверьте, что статистика обновляется при изменении '
+            'и удалении отзывов'
+        )
+        assert data['distribution']['5'] == 0
+        assert data['distribution']['10'] == 1
+
+        data = client.get(f'/api/v1/titles/{titles[1]["id"]}/stats/').json()
+        assert data['review_count'] == 0
+        assert data['mean'] is None and data['median'] is None
+        assert client.get('/api/v1/titles/0/stats/').status_code == 404
+        assert client.get('/api/v1/titles/abc/stats/').status_code == 404, (
+            'Проверьте, что нечисловой ключ произведения дает статус 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_stats_embedded(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        stats = client.get(f'/api/v1/titles/{titles[0]["id"]}/stats/').json()
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/?embed=stats'
+        )
+        assert response.json()['stats'] == stats, (
+            'Проверьте, что `?embed=stats` добавляет статистику '
+            'в карточку произведения'
+        )
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert 'stats' not in response.json()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rebuild_histograms(self, admin_client, admin):
+        from reviews.models import ScoreHistogram
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        ScoreHistogram.objects.all().delete()
+
+        out = StringIO()
+        call_command('rebuild_counters', stdout=out)
+        assert 'распределений оценок: 1' in out.getvalue()
+        histogram = ScoreHistogram.objects.get(title_id=titles[0]['id'])
+        assert histogram.counts() == [0, 0, 1, 1, 1, 0, 0, 0, 0, 0], (
+            'Проверьте, что `rebuild_counters` пересчитывает '
+            'распределения оценок'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_stats_embedded_without_fast_path(self, client, admin_client,
+                                                 admin, monkeypatch):
+        from django.core.cache import cache
+
+        from api.views import TitleViewSet
+        create_reviews(admin_client, admin)
+        for url in (
+            '/api/v1/titles/?embed=stats',
+            '/api/v1/titles/?embed=stats&fields=id,name',
+        ):
+            cache.clear()
+            fast = client.get(url)
+            monkeypatch.setattr(TitleViewSet, 'fast_serializer_class', None)
+            cache.clear()
+            slow = client.get(url)
+            monkeypatch.undo()
+            assert fast.content == slow.content, (
+                'Проверьте, что `?embed=stats` работает и без быстрого '
+                'сериализатора'
+            )
@@ -0,0 +1,108 @@
+import pytest
+from django.db import connection
+
+
+class Test24UserFeeds:
+
+    def walk(self, client, url):
+        rows = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            assert 'count' not in data
+            rows.extend(data['results'])
+            url = data['next']
+        return rows
+
+    def create_activity(self, django_user_model):
+        from reviews.models import Comment, Review, Title
+        author = django_user_model.objects.create_user(
+            username='writer', email='writer@yamdb.fake'
+        )
+        other = django_user_model.objects.create_user(
+            username='other', email='other@yamdb.fake'
+        )
+        titles = [
+            Title.objects.create(name=f'Книга {number}', year=1990)
+            for number in range(13)
+        ]
+        reviews = [
+            Review.objects.create(
+                title=title, author=author, text='Текст', score=7
+            )
+            for title in titles
+        ]
+        Review.objects.create(title=titles[0], author=other, text='-', score=1)
+        comments = [
+            Comment.objects.create(review=review, author=author, text='+1')
+            for review in reviews
+        ]
+        Comment.objects.create(review=reviews[0], author=other, text='-')
+        return author, titles, reviews, comments
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_user_reviews(self, client, django_user_model):
+        from reviews.models import Review
+        author, titles, reviews, _ = self.create_activity(django_user_model)
+        rows = self.walk(client, f'/api/v1/users/{author.username}/reviews/')
+        expected = list(
+            Review.objects.filter(author=author)
+            .order_by('-pub_date', '-id').values_list('id', flat=True)
+        )
+        assert [row['id'] for row in rows] == expected, (
+            'Проверьте, что `/api/v1/users/{username}/reviews/` отдает '
+            'все отзывы пользователя от новых к старым'
+        )
+        assert rows[-1]['title'] == {
+            'id': titles[0].id, 'name': titles[0].name
+        }, 'Проверьте, что в ленте указано произведение отзыва'
+        assert set(rows[0]) == {
+            'id', 'text', 'score', 'pub_date', 'comment_count', 'title'
+        }
+        response = client.get('/api/v1/users/nobody/reviews/')
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_user_comments(self, client, django_user_model):
+        from reviews.models import Review
+        author, titles, reviews, comments = self.create_activity(
+            django_user_model
+        )
+        Review.objects.filter(id=reviews[1].id).update(is_hidden=True)
+        rows = self.walk(client, f'/api/v1/users/{author.username}/comments/')
+        expected = [
+            comment.id for comment in reversed(comments)
+            if comment.review_id != reviews[1].id
+        ]
+        assert [row['id'] for row in rows] == expected, (
+            'Проверьте, что `/api/v1/users/{username}/comments/` отдает '
+            'видимые комментарии пользователя от новых к старым'
+        )
+        assert rows[-1]['review'] == reviews[0].id
+        assert rows[-1]['title'] == {
+            'id': titles[0].id, 'name': titles[0].name
+        }
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_feed_uses_author_index(self, client, django_user_model,
+                                       django_assert_num_queries):
+        from reviews.models import Comment, Review
+        author, _, _, _ = self.create_activity(django_user_model)
+        # Пользователь и строки страницы, без подсчета общего числа.
+        with django_assert_num_queries(2):
+            client.get(f'/api/v1/users/{author.username}/reviews/')
+        for model, index in (
+            (Review, 'review_author_pub_date_idx'),
+            (Comment, 'comment_author_pub_date_idx'),
+        ):
+            queryset = model.objects.visible().filter(
+                author=author
+            ).order_by('-pub_date', '-id')
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                plan = ' '.join(str(row) for row in cursor.fetchall())
+            assert index in plan, (
+                f'Проверьте, что лента пользователя читается по индексу {index}'
+            )
@@ -0,0 +1,167 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from jobs.registry import job
+
+calls = []
+
+
+@job('tests.flaky')
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError('Временная ошибка')
+
+
+class Test25Jobs:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_jobs_run_by_worker(self, settings):
+        from jobs.models import Job
+        from jobs.services import enqueue
+        settings.JOBS_EAGER = False
+        calls.clear()
+        job = enqueue('tests.flaky', fail_times=0)
+        assert calls == [], (
+            'Проверьте, что без JOBS_EAGER задача ждет обработчика'
+        )
+        assert job.status == Job.PENDING
+
+        call_command('run_jobs', '--once', stdout=StringIO())
+        assert calls == [0], (
+            'Проверьте, что команда `run_jobs` выполняет задачи из очереди'
+        )
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == (Job.DONE, 1)
+
+        call_command('run_jobs', '--once', stdout=StringIO())
+        assert calls == [0], (
+            'Проверьте, что выполненная задача не запускается повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retries_with_backoff(self, settings):
+        from jobs.models import Job
+        from jobs.services import enqueue, run_job
+        settings.JOBS_EAGER = False
+        calls.clear()
+        job = enqueue('tests.flaky', fail_times=1)
+        assert run_job(job.pk) is False
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == (Job.PENDING, 1)
+        assert 'Временная ошибка' in job.last_error
+        assert job.run_at > timezone.now(), (
+            'Проверьте, что после ошибки задача откладывается'
+        )
+        assert run_job(job.pk) is False, (
+            'Проверьте, что отложенная задача не берется раньше времени'
+        )
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        assert run_job(job.pk) is True
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == (Job.DONE, 2)
+
+        calls.clear()
+        job = enqueue('tests.flaky', fail_times=10)
+        Job.objects.filter(pk=job.pk).update(max_attempts=2)
+        run_job(job.pk)
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        run_job(job.pk)
+        job.refresh_from_db()
+        assert (job.status, job.attempts) == (Job.FAILED, 2), (
+            'Проверьте, что после max_attempts попыток задача '
+            'помечается как неудачная'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_idempotency_and_lease(self, settings):
+        from jobs.models import Job
+        from jobs.services import enqueue, run_job
+        settings.JOBS_EAGER = False
+        calls.clear()
+        first = enqueue('tests.flaky', key='once', fail_times=0)
+        second = enqueue('tests.flaky', key='once', fail_times=0)
+        assert first.pk == second.pk, (
+            'Проверьте, что задача с тем же ключом не создается повторно'
+        )
+        assert Job.objects.filter(idempotency_key='once').count() == 1
+
+        Job.objects.filter(pk=first.pk).update(
+            status=Job.RUNNING,
+            locked_until=timezone.now() + timedelta(minutes=1)
+        )
+        assert run_job(first.pk) is False, (
+            'Проверьте, что занятая обработчиком задача не выполняется дважды'
+        )
+        Job.objects.filter(pk=first.pk).update(
+            locked_until=timezone.now() - timedelta(minutes=1)
+        )
+        assert run_job(first.pk) is True, (
+            'Проверьте, что задача с истекшей арендой берется снова'
+        )
+        assert calls == [0]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_key_released_when_claimed(self, settings):
+        from jobs.models import Job
+        from jobs.services import enqueue, run_job
+        settings.JOBS_EAGER = False
+        calls.clear()
+        first = enqueue('tests.flaky', key='refresh', fail_times=0)
+        assert run_job(first.pk) is True
+        second = enqueue('tests.flaky', key='refresh', fail_times=0)
+        assert second.pk != first.pk, (
+            'Проверьте, что после начала выполнения задачи ее ключ '
+            'освобождается для новой'
+        )
+        assert Job.objects.get(pk=first.pk).idempotency_key is None
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_ranking_refresh_merged(self, settings, django_user_model):
+        from jobs.models import Job
+        from reviews.models import Review, Title
+        settings.JOBS_EAGER = False
+        title = Title.objects.create(name='Популярный', year=2000)
+        for number in range(3):
+            user = django_user_model.objects.create_user(
+                username=f'fan{number}', email=f'fan{number}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=user, text='Да', score=7
+            )
+        assert Job.objects.filter(
+            name='reviews.refresh_title_rankings'
+        ).count() == 1, (
+            'Проверьте, что ожидающие пересчеты рейтинга одного '
+            'произведения сливаются в одну задачу'
+        )
+        call_command('run_jobs', '--once', stdout=StringIO())
+        assert title.ranking.score > 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_purge_finished(self, settings):
+        from jobs.models import Job
+        from jobs.services import enqueue, run_job
+        settings.JOBS_EAGER = False
+        calls.clear()
+        old = enqueue('tests.flaky', fail_times=0)
+        run_job(old.pk)
+        Job.objects.filter(pk=old.pk).update(
+            finished=timezone.now() - timedelta(
+                seconds=settings.JOBS_RETENTION + 1
+            )
+        )
+        recent = enqueue('tests.flaky', fail_times=0)
+        run_job(recent.pk)
+        pending = enqueue('tests.flaky', delay=60, fail_times=0)
+        out = StringIO()
+        call_command('run_jobs', '--once', stdout=out)
+        assert 'удалено старых: 1' in out.getvalue()
+        assert set(Job.objects.values_list('pk', flat=True)) == {
+            recent.pk, pending.pk
+        }, 'Проверьте, что run_jobs удаляет старые завершенные задачи'
@@ -0,0 +1,148 @@
+import pytest
+
+from .common import auth_client
+
+
+class Test26TextSearch:
+
+    def create_texts(self, django_user_model):
+        from reviews.models import Comment, Review, Title
+        users = [
+            django_user_model.objects.create_user(
+                username=f'critic{number}', email=f'critic{number}@yamdb.fake'
+            )
+            for number in range(3)
+        ]
+        moderator = django_user_model.objects.create_user(
+            username='keeper', email='keeper@yamdb.fake', role='moderator'
+        )
+        title = Title.objects.create(name='Солярис', year=1972)
+        other = Title.objects.create(name='Сталкер', year=1979)
+        reviews = [
+            Review.objects.create(
+                title=title, author=users[0], score=9,
+                text='Медленное и красивое кино про океан и память'
+            ),
+            Review.objects.create(
+                title=title, author=users[1], score=4,
+                text='Слишком медленно, я уснул'
+            ),
+            Review.objects.create(
+                title=other, author=users[0], score=8,
+                text='Зона, медленное путешествие и разговоры'
+            ),
+        ]
+        comments = [
+            Comment.objects.create(
+                review=reviews[0], author=users[2], text='Океан прекрасен'
+            ),
+            Comment.objects.create(
+                review=reviews[2], author=users[2], text='Про океан ни слова'
+            ),
+        ]
+        return title, other, reviews, comments, moderator
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_title_scoped_search(self, client, django_user_model):
+        title, _, reviews, comments, _ = self.create_texts(django_user_model)
+        url = f'/api/v1/titles/{title.id}/search/reviews/?q=медленн'
+        response = client.get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что поиск по отзывам произведения доступен '
+            'без авторизации'
+        )
+        results = response.json()['results']
+        assert {row['id'] for row in results} == {
+            reviews[0].id, reviews[1].id
+        }, 'Проверьте, что поиск ограничен отзывами произведения'
+        snippet = next(
+            row['snippet'] for row in results if row['id'] == reviews[0].id
+        )
+        assert '<mark>Медленное</mark>' in snippet, (
+            'Проверьте, что фрагмент выделяет найденные слова'
+        )
+
+        response = client.get(
+            f'/api/v1/titles/{title.id}/search/comments/?q=океан'
+        )
+        assert [row['id'] for row in response.json()['results']] == [
+            comments[0].id
+        ]
+        assert response.json()['results'][0]['title'] == {
+            'id': title.id, 'name': title.name
+        }
+
+        response = client.get(f'/api/v1/titles/{title.id}/search/reviews/')
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_global_search_for_moderators(self, client, django_user_model):
+        from reviews.models import Review
+        _, _, reviews, comments, moderator = self.create_texts(
+            django_user_model
+        )
+        assert client.get('/api/v1/search/reviews/?q=зона').status_code == 401
+        moderator_client = auth_client(moderator)
+        response = moderator_client.get('/api/v1/search/comments/?q=океан')
+        assert response.status_code == 200
+        assert {row['id'] for row in response.json()['results']} == {
+            comment.id for comment in comments
+        }, 'Проверьте, что модератор ищет комментарии по всем произведениям'
+
+        review = reviews[2]
+        review.text = 'Переписанный отзыв без старых слов'
+        review.save()
+        response = moderator_client.get('/api/v1/search/reviews/?q=зона')
+        assert response.json()['results'] == [], (
+            'Проверьте, что индекс обновляется при изменении текста'
+        )
+        response = moderator_client.get('/api/v1/search/reviews/?q=переписан')
+        assert [row['id'] for row in response.json()['results']] == [
+            review.id
+        ]
+
+        Review.objects.filter(id=reviews[1].id).update(is_hidden=True)
+        Review.objects.filter(id=reviews[0].id).delete()
+        response = moderator_client.get('/api/v1/search/reviews/?q=медленн')
+        assert response.json()['results'] == [], (
+            'Проверьте, что скрытые и удаленные отзывы не находятся'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_snippet_escaped(self, client, django_user_model):
+        from reviews.models import Review, Title
+        user = django_user_model.objects.create_user(
+            username='hacker', email='hacker@yamdb.fake'
+        )
+        title = Title.objects.create(name='Опасный', year=2000)
+        Review.objects.create(
+            title=title, author=user, score=5,
+            text='great <img src=x onerror=alert(1)> movie'
+        )
+        response = client.get(
+            f'/api/v1/titles/{title.id}/search/reviews/?q=great'
+        )
+        snippet = response.json()['results'][0]['snippet']
+        assert snippet == (
+            '<mark>great</mark> &lt;img src=x onerror=alert(1)&gt; movie'
+        ), (
+            'Проверьте, что текст пользователя во фрагменте экранирован, '
+            'а теги добавляются только вокруг найденных слов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_query_without_words(self, client, django_user_model):
+        title, _, _, _, moderator = self.create_texts(django_user_model)
+        urls = (
+            (client, f'/api/v1/titles/{title.id}/search/comments/?q=!!!'),
+            (client, f'/api/v1/titles/{title.id}/search/reviews/?q=""'),
+            (auth_client(moderator), '/api/v1/search/reviews/?q=""'),
+            (auth_client(moderator), '/api/v1/search/comments/?q=!!!'),
+        )
+        for user_client, url in urls:
+            response = user_client.get(url)
+            assert response.status_code == 400, (
+                f'Проверьте, что GET запрос `{url}` со строкой поиска '
+                'без слов возвращает статус 400'
+            )
+            assert 'q' in response.json()
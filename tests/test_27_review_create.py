@@ -0,0 +1,68 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client
+
+
+class Test27ReviewCreate:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_insert_without_prefetch(self, django_user_model):
+        from reviews.models import Title
+        user = django_user_model.objects.create_user(
+            username='fast', email='fast@yamdb.fake'
+        )
+        title = Title.objects.create(name='Быстрый', year=2000)
+        client = auth_client(user)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'Ок', 'score': 8}
+            )
+        assert response.status_code == 201
+        queries = [query['sql'] for query in context.captured_queries]
+        insert = next(
+            number for number, sql in enumerate(queries)
+            if sql.startswith('INSERT INTO "reviews_review"')
+        )
+        assert not any(
+            'FROM "reviews_title"' in sql or 'FROM "reviews_review"' in sql
+            for sql in queries[:insert]
+        ), (
+            'Проверьте, что перед созданием отзыва не загружается '
+            'произведение и не проверяется повтор отдельным запросом'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_constraint_errors(self, django_user_model):
+        from reviews.models import Review, Title
+        user = django_user_model.objects.create_user(
+            username='twice', email='twice@yamdb.fake'
+        )
+        title = Title.objects.create(name='Дважды', year=2000)
+        # Отзыв, созданный параллельным запросом.
+        Review.objects.create(title=title, author=user, text='Первый', score=6)
+        client = auth_client(user)
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Второй', 'score': 9}
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв на произведение '
+            'возвращает статус 400, а не 500'
+        )
+        title.refresh_from_db()
+        assert (title.score_sum, title.review_count) == (6, 1), (
+            'Проверьте, что отклоненный отзыв не меняет счетчики'
+        )
+
+        response = client.post(
+            f'/api/v1/titles/{title.id + 100}/reviews/',
+            data={'text': 'Никуда', 'score': 9}
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что отзыв на несуществующее произведение '
+            'возвращает статус 404'
+        )
+        assert Review.objects.count() == 1
@@ -0,0 +1,114 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+class Test28ClaimsAuth:
+
+    def obtain_client(self, user):
+        from users.services import issue_confirmation_code
+        response = APIClient().post('/api/v1/auth/token/', data={
+            'username': user.username,
+            'confirmation_code': issue_confirmation_code(user)
+        })
+        assert response.status_code == 200
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+        return client
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_no_user_query(self, django_user_model):
+        from reviews.models import Title
+        admin = django_user_model.objects.create_user(
+            username='boss', email='boss@yamdb.fake', role='admin'
+        )
+        client = self.obtain_client(admin)
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                '/api/v1/categories/', data={'name': 'Кино', 'slug': 'kino'}
+            )
+        assert response.status_code == 201
+        assert not any(
+            'FROM "users_user"' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что токен с ролью не требует чтения '
+            'пользователя из базы'
+        )
+
+        title = Title.objects.create(name='Фильм', year=2000)
+        response = client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Хорошо', 'score': 7}
+        )
+        assert response.status_code == 201
+        assert response.json()['author'] == admin.username
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['username'] == admin.username
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_role_change_revokes_claims(self, admin_client,
+                                           django_user_model):
+        user = django_user_model.objects.create_user(
+            username='climber', email='climber@yamdb.fake'
+        )
+        client = self.obtain_client(user)
+        data = {'name': 'Книги', 'slug': 'books'}
+        assert client.post('/api/v1/categories/', data=data).status_code == 403
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert client.post('/api/v1/categories/', data=data).status_code == 201, (
+            'Проверьте, что после смены роли старый токен '
+            'не использует устаревшую роль'
+        )
+
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert client.post(
+            '/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'}
+        ).status_code == 401, (
+            'Проверьте, что токен удаленного пользователя не действует'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_old_claims_not_trusted(self, settings, django_user_model):
+        user = django_user_model.objects.create_user(
+            username='veteran', email='veteran@yamdb.fake', role='admin'
+        )
+        client = self.obtain_client(user)
+        settings.AUTH_CLAIMS_MAX_AGE = -1
+        with CaptureQueriesContext(connection) as context:
+            client.post(
+                '/api/v1/categories/', data={'name': 'Кино', 'slug': 'kino'}
+            )
+        assert any(
+            'FROM "users_user"' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что утверждениям старого токена не доверяют'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_revocation_survives_cache_churn(self, django_user_model):
+        from django.core.cache import cache
+        admin = django_user_model.objects.create_user(
+            username='demoted', email='demoted@yamdb.fake', role='admin'
+        )
+        client = self.obtain_client(admin)
+        admin.role = 'user'
+        admin.save()
+        # Много ответов в общем кэше вытесняют старые записи.
+        for number in range(1000):
+            cache.set(f'churn:{number}', number)
+        response = client.post(
+            '/api/v1/categories/', data={'name': 'Кино', 'slug': 'kino'}
+        )
+        assert response.status_code == 403, (
+            'Проверьте, что отметка об отзыве роли не вытесняется '
+            'кэшем ответов'
+        )
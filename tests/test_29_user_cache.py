@@ -0,0 +1,108 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def plain_token_client(user):
+    # Токен без утверждений о роли: пользователь берется из кэша.
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "users_user"' in query['sql']
+    ]
+
+
+class Test29UserCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_read_through(self, django_user_model):
+        from users.user_cache import user_cache
+        admin = django_user_model.objects.create_user(
+            username='cached', email='cached@yamdb.fake', role='admin'
+        )
+        client = plain_token_client(admin)
+        user_cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            for number in range(3):
+                response = client.post('/api/v1/categories/', data={
+                    'name': f'Раздел {number}', 'slug': f'part{number}'
+                })
+                assert response.status_code == 201
+        assert len(user_queries(context)) == 1, (
+            'Проверьте, что пользователь читается из базы один раз, '
+            'а дальше берется из кэша'
+        )
+        stats = user_cache.stats()
+        assert (stats['hits'], stats['misses']) == (2, 1), (
+            'Проверьте, что кэш считает попадания и промахи'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalidated_on_change(self, admin_client, django_user_model):
+        user = django_user_model.objects.create_user(
+            username='promoted', email='promoted@yamdb.fake'
+        )
+        client = plain_token_client(user)
+        data = {'name': 'Книги', 'slug': 'books'}
+        assert client.post('/api/v1/categories/', data=data).status_code == 403
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert client.post('/api/v1/categories/', data=data).status_code == 201, (
+            'Проверьте, что изменение пользователя сбрасывает его запись в кэше'
+        )
+
+        user.refresh_from_db()
+        user.is_active = False
+        user.save()
+        response = client.get('/api/v1/categories/')
+        assert response.status_code == 401, (
+            'Проверьте, что отключенный пользователь не проходит '
+            'аутентификацию'
+        )
+
+        user.delete()
+        assert client.get('/api/v1/categories/').status_code == 401, (
+            'Проверьте, что удаленный пользователь не проходит '
+            'аутентификацию'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_lru_and_shared_cache(self, settings, django_user_model):
+        from django.core.cache import cache
+        from users.user_cache import user_cache, user_key
+        settings.USER_CACHE_MAXSIZE = 2
+        settings.USER_CACHE_ALIAS = 'default'
+        users = [
+            django_user_model.objects.create_user(
+                username=f'reader{number}', email=f'reader{number}@yamdb.fake'
+            )
+            for number in range(3)
+        ]
+        user_cache.clear()
+        for user in users:
+            user_cache.get(user.pk)
+        assert user_cache.stats()['size'] == 2, (
+            'Проверьте, что кэш в памяти ограничен USER_CACHE_MAXSIZE'
+        )
+        assert cache.get(user_key(users[0].pk))['username'] == 'reader0'
+
+        with CaptureQueriesContext(connection) as context:
+            assert user_cache.get(users[0].pk)['username'] == 'reader0'
+        assert not user_queries(context), (
+            'Проверьте, что вытесненная запись берется из общего кэша'
+        )
+        assert user_cache.stats()['shared_hits'] == 1
+
+        users[0].delete()
+        assert cache.get(user_key(users[0].pk)) is None
+        assert user_cache.get(users[0].pk) is None
@@ -0,0 +1,147 @@
+import re
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class Test30ConfirmationCode:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+
+    def signup(self, client, username):
+        response = client.post(self.url_signup, data={
+            'username': username, 'email': f'{username}@yamdb.fake'
+        })
+        assert response.status_code == 200
+        return re.search(
+            r'код подтверждения (\S+)\.', mail.outbox[-1].body
+        ).group(1)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_single_use_code(self, client, django_user_model):
+        from users.models import ConfirmationCode
+        code = self.signup(client, 'newbie')
+        user = django_user_model.objects.get(username='newbie')
+        assert not user.has_usable_password(), (
+            'Проверьте, что код подтверждения не сохраняется как пароль'
+        )
+        stored = ConfirmationCode.objects.get(user=user)
+        assert code not in stored.code_hash, (
+            'Проверьте, что код хранится только в виде HMAC'
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.url_token, data={
+                'username': 'newbie', 'confirmation_code': code
+            })
+        assert response.status_code == 200
+        assert 'token' in response.json()
+        queries = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'] != 'BEGIN'
+        ]
+        assert len(queries) <= 3, (
+            'Проверьте, что выдача токена обходится несколькими '
+            'простыми запросами'
+        )
+        response = client.post(self.url_token, data={
+            'username': 'newbie', 'confirmation_code': code
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что код подтверждения нельзя использовать повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_attempts_limited(self, client, settings):
+        settings.CONFIRMATION_CODE_MAX_ATTEMPTS = 3
+        code = self.signup(client, 'guesser')
+        for number in range(3):
+            response = client.post(self.url_token, data={
+                'username': 'guesser', 'confirmation_code': f'wrong{number}'
+            })
+            assert response.status_code == 400
+        response = client.post(self.url_token, data={
+            'username': 'guesser', 'confirmation_code': code
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что после CONFIRMATION_CODE_MAX_ATTEMPTS неверных '
+            'попыток код перестает действовать'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_expired_code(self, client, django_user_model):
+        from django.utils import timezone
+        from users.models import ConfirmationCode
+        code = self.signup(client, 'late')
+        ConfirmationCode.objects.update(expires=timezone.now())
+        response = client.post(self.url_token, data={
+            'username': 'late', 'confirmation_code': code
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что просроченный код не принимается'
+        )
+
+        django_user_model.objects.filter(username='late').update(
+            is_active=False
+        )
+        from users.services import issue_confirmation_code
+        user = django_user_model.objects.get(username='late')
+        response = client.post(self.url_token, data={
+            'username': 'late',
+            'confirmation_code': issue_confirmation_code(user)
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что отключенный пользователь не получает токен'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_signup_again_issues_new_code(self, client, settings,
+                                             django_user_model):
+        settings.CONFIRMATION_CODE_MAX_ATTEMPTS = 1
+        old_code = self.signup(client, 'locked')
+        client.post(self.url_token, data={
+            'username': 'locked', 'confirmation_code': 'wrong'
+        })
+        code = self.signup(client, 'locked')
+        assert code != old_code
+        response = client.post(self.url_token, data={
+            'username': 'locked', 'confirmation_code': code
+        })
+        assert response.status_code == 200, (
+            'Проверьте, что повторная регистрация с теми же именем и email '
+            'выдает новый код вместо заблокированного'
+        )
+
+        response = client.post(self.url_signup, data={
+            'username': 'locked', 'email': 'stranger@yamdb.fake'
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что код не выдается при чужом email'
+        )
+
+        # Пользователь, созданный без кода (администратором или до
+        # появления кодов подтверждения).
+        django_user_model.objects.create_user(
+            username='legacy', email='legacy@yamdb.fake', password='secret'
+        )
+        code = self.signup(client, 'legacy')
+        response = client.post(self.url_token, data={
+            'username': 'legacy', 'confirmation_code': code
+        })
+        assert response.status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_non_object_body(self, client, monkeypatch):
+        from users.views import SignupView
+        # Без ограничения частоты тело читает только сама вьюха.
+        monkeypatch.setattr(SignupView, 'throttle_classes', [])
+        for body in ([], ['admin'], 'admin', 1):
+            response = client.post(
+                self.url_signup, data=body, content_type='application/json'
+            )
+            assert response.status_code == 400, (
+                'Проверьте, что регистрация с телом не в виде объекта '
+                'возвращает статус 400'
+            )
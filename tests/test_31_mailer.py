@@ -0,0 +1,160 @@
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+failures = []
+opened = []
+
+
+class FlakyBackend(EmailBackend):
+    """Почтовый сервер-заглушка: считает соединения и отклоняет
+    письма адресатам из failures."""
+
+    def open(self):
+        opened.append(self)
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & set(failures):
+                raise ConnectionError('Сервер отклонил письмо')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def flaky_backend(settings):
+    settings.EMAIL_BACKEND = 'tests.test_31_mailer.FlakyBackend'
+    failures.clear()
+    opened.clear()
+
+
+class Test31Mailer:
+
+    def queue(self, number):
+        from mailer.services import queue_mail
+        return [
+            queue_mail('Тема', f'Письмо {index}', [f'user{index}@yamdb.fake'])
+            for index in range(number)
+        ]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_queues_mail(self, client, settings):
+        from mailer.models import OutgoingEmail
+        settings.MAILER_EAGER = False
+        outbox_before_count = len(mail.outbox)
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'queued', 'email': 'queued@yamdb.fake'
+        })
+        assert response.status_code == 200
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что письмо с кодом не отправляется в запросе'
+        )
+        message = OutgoingEmail.objects.get()
+        assert message.status == OutgoingEmail.PENDING
+
+        call_command('send_outbox', '--once', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что команда `send_outbox` отправляет письма из очереди'
+        )
+        assert mail.outbox[-1].to == ['queued@yamdb.fake']
+        message.refresh_from_db()
+        assert (message.status, message.attempts) == (OutgoingEmail.SENT, 1)
+        assert message.body == '', (
+            'Проверьте, что текст письма с кодом не хранится после отправки'
+        )
+
+        call_command('send_outbox', '--once', stdout=StringIO())
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что отправленное письмо не уходит повторно'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_one_connection_per_batch(self, settings, flaky_backend):
+        from mailer.models import OutgoingEmail
+        from mailer.services import deliver_outbox
+        settings.MAILER_EAGER = False
+        self.queue(5)
+        assert deliver_outbox(limit=3) == 3
+        assert len(opened) == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        assert deliver_outbox(limit=3) == 2
+        assert len(opened) == 2
+        assert OutgoingEmail.objects.filter(
+            status=OutgoingEmail.SENT
+        ).count() == 5
+        assert deliver_outbox() == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_retry_with_backoff(self, settings, flaky_backend):
+        from django.utils import timezone
+        from mailer.models import OutgoingEmail
+        from mailer.services import deliver_outbox
+        settings.MAILER_EAGER = False
+        failing, working = self.queue(2)
+        failures.append('user0@yamdb.fake')
+        deliver_outbox()
+        failing.refresh_from_db()
+        working.refresh_from_db()
+        assert working.status == OutgoingEmail.SENT, (
+            'Проверьте, что ошибка одного письма не мешает остальным'
+        )
+        assert (failing.status, failing.attempts) == (
+            OutgoingEmail.PENDING, 1
+        )
+        assert failing.send_after > timezone.now(), (
+            'Проверьте, что неотправленное письмо откладывается'
+        )
+        assert 'Сервер отклонил письмо' in failing.last_error
+        assert deliver_outbox() == 0, (
+            'Проверьте, что отложенное письмо не берется раньше времени'
+        )
+
+        OutgoingEmail.objects.filter(pk=failing.pk).update(
+            send_after=timezone.now(), max_attempts=2
+        )
+        deliver_outbox()
+        failing.refresh_from_db()
+        assert (failing.status, failing.attempts) == (
+            OutgoingEmail.FAILED, 2
+        ), (
+            'Проверьте, что после max_attempts попыток письмо '
+            'помечается как неудачное'
+        )
+        assert failing.body == ''
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_purge_old_messages(self, settings):
+        from datetime import timedelta
+
+        from django.utils import timezone
+        from mailer.models import OutgoingEmail
+        settings.MAILER_EAGER = False
+        sent, failed, pending = self.queue(3)
+        OutgoingEmail.objects.filter(pk=sent.pk).update(
+            status=OutgoingEmail.SENT
+        )
+        OutgoingEmail.objects.filter(pk=failed.pk).update(
+            status=OutgoingEmail.FAILED
+        )
+        OutgoingEmail.objects.update(
+            created=timezone.now() - timedelta(
+                seconds=settings.MAILER_RETENTION + 1
+            )
+        )
+        OutgoingEmail.objects.create(
+            subject='Тема', body='', to='new@yamdb.fake',
+            status=OutgoingEmail.SENT
+        )
+        out = StringIO()
+        call_command('send_outbox', '--once', stdout=out)
+        assert 'удалено старых: 2' in out.getvalue()
+        assert not OutgoingEmail.objects.filter(
+            pk__in=(sent.pk, failed.pk)
+        ).exists(), (
+            'Проверьте, что старые отправленные и неудачные письма удаляются'
+        )
+        assert OutgoingEmail.objects.count() == 2
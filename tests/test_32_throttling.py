@@ -0,0 +1,146 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client
+
+
+def set_rates(settings, **rates):
+    config = dict(settings.REST_FRAMEWORK)
+    config['DEFAULT_THROTTLE_RATES'] = dict(
+        config['DEFAULT_THROTTLE_RATES'], **rates
+    )
+    settings.REST_FRAMEWORK = config
+
+
+class Test32Throttling:
+    url_signup = '/api/v1/auth/signup/'
+    url_token = '/api/v1/auth/token/'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_per_ip_and_identity(self, client, settings):
+        set_rates(settings, signup='3/hour', signup_identity='1/hour')
+        for number in range(3):
+            response = client.post(self.url_signup, data={
+                'username': f'burst{number}',
+                'email': f'burst{number}@yamdb.fake'
+            })
+            assert response.status_code == 200
+        response = client.post(self.url_signup, data={
+            'username': 'burst9', 'email': 'burst9@yamdb.fake'
+        })
+        assert response.status_code == 429, (
+            'Проверьте, что регистрация ограничена по IP'
+        )
+        assert 'Retry-After' in response, (
+            'Проверьте, что ответ 429 сообщает, когда повторить запрос'
+        )
+
+        response = client.post(
+            self.url_signup,
+            data={'username': 'burst0', 'email': 'other@yamdb.fake'},
+            REMOTE_ADDR='10.0.0.2'
+        )
+        assert response.status_code == 429, (
+            'Проверьте, что регистрация ограничена по имени пользователя '
+            'независимо от IP'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_token_per_username(self, client, settings,
+                                   django_user_model):
+        set_rates(settings, token_identity='2/min')
+        django_user_model.objects.create_user(
+            username='target', email='target@yamdb.fake'
+        )
+        statuses = [
+            client.post(self.url_token, data={
+                'username': 'target', 'confirmation_code': f'guess{number}'
+            }, REMOTE_ADDR=f'10.0.0.{number}').status_code
+            for number in range(3)
+        ]
+        assert statuses == [400, 400, 429], (
+            'Проверьте, что подбор кода к одному пользователю '
+            'ограничен независимо от IP'
+        )
+        with CaptureQueriesContext(connection) as context:
+            client.post(self.url_token, data={
+                'username': 'target', 'confirmation_code': 'guess'
+            })
+        assert not context.captured_queries, (
+            'Проверьте, что ограничение срабатывает без запросов к базе'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_write_throttle(self, settings, admin):
+        set_rates(settings, write='2/min')
+        client = auth_client(admin)
+        statuses = [
+            client.post('/api/v1/categories/', data={
+                'name': f'Раздел {number}', 'slug': f'part{number}'
+            }).status_code
+            for number in range(3)
+        ]
+        assert statuses == [201, 201, 429], (
+            'Проверьте, что изменяющие запросы ограничены по пользователю'
+        )
+        assert client.get('/api/v1/categories/').status_code == 200, (
+            'Проверьте, что чтение не ограничивается'
+        )
+
+        set_rates(settings, write=None)
+        response = client.post(
+            '/api/v1/categories/', data={'name': 'Еще', 'slug': 'more'}
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что ограничение отключается значением None'
+        )
+
+    def test_04_bucket_refill(self, settings):
+        from api.throttling import BucketStore, refill
+        bucket, wait = refill(None, 2, 60, now=100)
+        assert (bucket, wait) == ((1, 100), 0)
+        bucket, wait = refill(bucket, 2, 60, now=100)
+        bucket, wait = refill(bucket, 2, 60, now=100)
+        assert wait == 30, 'Проверьте расчет паузы до следующего жетона'
+        bucket, wait = refill(bucket, 2, 60, now=130)
+        assert wait == 0, 'Проверьте, что корзина пополняется со временем'
+
+        settings.THROTTLE_MAX_BUCKETS = 2
+        store = BucketStore()
+        for key in ('a', 'b', 'c'):
+            store.take(key, 1, 60)
+        assert store.take('a', 1, 60) == 0, (
+            'Проверьте, что давно не использованные корзины вытесняются'
+        )
+        assert store.take('c', 1, 60) > 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_forwarded_for_ignored(self, client, settings):
+        set_rates(settings, signup='2/hour')
+        statuses = [
+            client.post(self.url_signup, data={
+                'username': f'proxy{number}',
+                'email': f'proxy{number}@yamdb.fake'
+            }, HTTP_X_FORWARDED_FOR=f'10.1.0.{number}').status_code
+            for number in range(3)
+        ]
+        assert statuses == [200, 200, 429], (
+            'Проверьте, что подмена заголовка X-Forwarded-For '
+            'не обходит ограничение по IP'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_non_object_body(self, client, settings):
+        set_rates(settings, signup='2/hour', token='2/hour')
+        for url in (self.url_signup, self.url_token):
+            statuses = [
+                client.post(
+                    url, data=body, content_type='application/json'
+                ).status_code
+                for body in ([], ['admin'], '"admin"')
+            ]
+            assert statuses == [400, 400, 429], (
+                f'Проверьте, что POST запрос `{url}` с телом не в виде '
+                'объекта возвращает статус 400 и ограничивается по IP'
+            )